@@ -0,0 +1,230 @@
+# article_extractor.py - Single-pass, streaming main-text extractor for article pages
+
+import re
+from html.parser import HTMLParser
+
+# Elements whose content is never article text
+NOISE_TAGS = {'nav', 'header', 'footer', 'aside', 'script', 'style', 'noscript', 'form',
+              'svg', 'iframe', 'button', 'select', 'template'}
+NOISE_CLASSES = {'ads', 'comments'}
+
+# Elements that hold a run of text, and the containers that collect them
+TEXT_BLOCK_TAGS = {'p', 'li', 'blockquote', 'pre', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'dd', 'figcaption'}
+CONTAINER_TAGS = {'body', 'div', 'article', 'section', 'main', 'td', 'ul', 'ol'}
+
+# Containers that usually are the article (same hints as the old CSS selectors)
+CONTENT_TAGS = {'article', 'main'}
+CONTENT_NAMES = {'article-content', 'entry-content', 'post-content', 'article-body', 'content', 'story'}
+
+# Containers that can hold a whole menu or the whole page; filling one doesn't mean the article was read
+WRAPPER_TAGS = {'body', 'ul', 'ol'}
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+             'param', 'source', 'track', 'wbr'}
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+class ArticleExtractor(HTMLParser):
+    """
+    Extract the main text of an article page in one streaming pass
+
+    Noise elements are skipped as they are parsed. Text from paragraph-like
+    blocks is added to every container around it, so an article split over
+    several <section>s is kept whole. Each container is scored by the text
+    it holds, fully for its own blocks and half as much per level of
+    nesting in between, and the best score wins (with a bonus for
+    <article>/<main> and common content classes). Chunks can be fed as
+    they download; once an <article>/<main> or content-class container has
+    max_chars of text, or max_bytes of HTML were read, done is set and the
+    rest of the page can be skipped.
+    """
+
+    def __init__(self, max_chars=3000, max_bytes=2 * 1024 * 1024):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.done = False
+        self._stack = []  # [tag, is_noise, container or None, text block parts or None]
+        self._noise_depth = 0
+        self._containers = []
+        self._all_text_length = 0
+        self._all_text = []
+
+    def feed(self, data):
+        """Feed the next chunk of HTML (ignored once extraction is done)"""
+        if self.done:
+            return
+        self.bytes_read += len(data)
+        super().feed(data)
+        if self.bytes_read >= self.max_bytes:
+            self.done = True
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+
+        attributes = dict(attrs)
+        names = set((attributes.get('class') or '').split())
+        if attributes.get('id'):
+            names.add(attributes['id'])
+
+        is_noise = tag in NOISE_TAGS or bool(names & NOISE_CLASSES)
+        if is_noise:
+            self._noise_depth += 1
+
+        container = None
+        if tag in CONTAINER_TAGS:
+            hint = tag in CONTENT_TAGS or bool(names & CONTENT_NAMES)
+            container = {'parts': [], 'length': 0, 'score': 0, 'hint': hint,
+                         'stops': hint and tag not in WRAPPER_TAGS}
+            self._containers.append(container)
+
+        block = [] if tag in TEXT_BLOCK_TAGS else None
+        self._stack.append([tag, is_noise, container, block])
+
+    def handle_endtag(self, tag):
+        # Tolerate unclosed elements by popping back to the matching start tag
+        if not any(entry[0] == tag for entry in self._stack):
+            return
+
+        while self._stack:
+            entry = self._stack.pop()
+            self._close(entry)
+            if entry[0] == tag:
+                break
+
+    def _close(self, entry):
+        tag, is_noise, container, block = entry
+        if is_noise:
+            self._noise_depth -= 1
+
+        # Credit a finished text block to the containers above it
+        if block:
+            self._add_text(self._stack, ' '.join(block))
+
+    def _add_text(self, stack, text):
+        """Add text to every container in stack, scoring nearer containers higher"""
+        weight = 1.0
+        for entry in reversed(stack):
+            container = entry[2]
+            if container is None:
+                continue
+
+            container['parts'].append(text)
+            container['length'] += len(text)
+            container['score'] += len(text) * weight
+            weight /= 2
+            if container['stops'] and container['length'] >= self.max_chars:
+                self.done = True
+
+    def handle_data(self, data):
+        if self._noise_depth or self.done:
+            return
+
+        text = WHITESPACE_PATTERN.sub(' ', data).strip()
+        if not text:
+            return
+
+        if self._all_text_length < self.max_chars:
+            self._all_text.append(text)
+            self._all_text_length += len(text)
+
+        # Text inside a paragraph-like block waits for the block to close
+        for entry in reversed(self._stack):
+            if entry[3] is not None:
+                entry[3].append(text)
+                return
+
+        # Loose text directly in a container counts too
+        self._add_text(self._stack, text)
+
+    def text(self):
+        """Return the extracted main text"""
+        # Flush blocks that were still open when reading stopped
+        for index in range(len(self._stack) - 1, -1, -1):
+            block = self._stack[index][3]
+            if block:
+                self._add_text(self._stack[:index], ' '.join(block))
+                self._stack[index][3] = None
+
+        best = max(self._containers, key=lambda container: container['score'] * (1.5 if container['hint'] else 1),
+                   default=None)
+        if best and best['length'] > 300:
+            return ' '.join(best['parts'])
+
+        # Fall back to all visible text
+        return ' '.join(self._all_text)
+
+def extract_text(html, max_chars=3000, max_bytes=2 * 1024 * 1024):
+    """Extract the main article text from a complete HTML document"""
+    extractor = ArticleExtractor(max_chars=max_chars, max_bytes=max_bytes)
+    extractor.feed(html)
+    return extractor.text()
+
+# Benchmark against the previous BeautifulSoup extraction
+if __name__ == "__main__":
+    import glob
+    import os
+    import sys
+    import time
+    from bs4 import BeautifulSoup
+
+    def soup_extract(html):
+        soup = BeautifulSoup(html, 'html.parser')
+        for element in soup.select('nav, header, footer, aside, script, style, .ads, .comments'):
+            element.extract()
+        for selector in ['article', '.article-content', '.entry-content', '.post-content',
+                         '.article-body', 'main', '#content', '.story']:
+            content = soup.select_one(selector)
+            if content and len(content.get_text(strip=True)) > 300:
+                return ' '.join(content.get_text(strip=True).split())
+        return ' '.join(soup.body.get_text(strip=True).split()) if soup.body else ''
+
+    paths = []
+    for argument in sys.argv[1:]:
+        paths.extend(glob.glob(os.path.join(argument, '*.htm*')) if os.path.isdir(argument) else [argument])
+
+    if paths:
+        pages = {path: open(path, encoding='utf-8', errors='replace').read() for path in paths}
+    else:
+        paragraphs = ''.join(f"<p>Paragraph {i} of the article explains the funding round in detail. " * 3 + "</p>"
+                             for i in range(60))
+        page = ("<html><head><script>var x = 1;</script><style>body{}</style></head><body>"
+                "<header><nav>" + "<a href='#'>Menu item</a>" * 200 + "</nav></header>"
+                "<div class='layout'><article><h1>Startup raises $20M</h1>" + paragraphs + "</article>"
+                "<aside>" + "<div class='ads'>Buy now</div>" * 100 + "</aside>"
+                "<div class='comments'>" + "<p>Great post!</p>" * 500 + "</div></div>"
+                "<footer>" + "<a href='#'>Link</a>" * 300 + "</footer></body></html>")
+        # Article text spread over several wrappers, which must be kept whole
+        sections = ''.join("<section>" + ''.join(f"<p>Paragraph {3 * s + i} covers the investors and the round size. "
+                                                 "The company will hire engineers.</p>" for i in range(3)) + "</section>"
+                           for s in range(3))
+        sectioned = ("<html><body><nav>Menu</nav><div class='wrap'><article>" + sections + "</article>"
+                     "<div class='related'><p>Related: another story</p></div></div></body></html>")
+        # Navigation built from a plain list rather than <nav>, longer than max_chars
+        menu = ("<html><body><div class='menu'><ul>" + "<li><a href='#'>Menu section link</a></li>" * 150 +
+                "</ul></div><article><h1>Startup raises $20M</h1>" + paragraphs + "</article></body></html>")
+        pages = {'synthetic page': page, 'sectioned article': sectioned, 'list menu page': menu}
+
+    def words(text):
+        return set(text[:3000].lower().split())
+
+    total_old = total_new = 0
+    for name, html in pages.items():
+        started = time.perf_counter()
+        old_text = soup_extract(html)
+        old_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        new_text = extract_text(html)
+        new_time = time.perf_counter() - started
+
+        total_old += old_time
+        total_new += new_time
+        old_words, new_words = words(old_text), words(new_text)
+        overlap = len(old_words & new_words) / len(old_words) if old_words else 1.0
+        print(f"{os.path.basename(name)[:40]:40} soup {old_time * 1000:7.1f}ms  streaming {new_time * 1000:7.1f}ms  "
+              f"word overlap {overlap:.0%}  chars {len(old_text[:3000])}/{len(new_text[:3000])}")
+
+    print(f"total: soup {total_old:.3f}s, streaming {total_new:.3f}s ({total_old / max(total_new, 1e-9):.1f}x)")
@@ -0,0 +1,328 @@
+# cache.py - Shared caching helpers (TTL caches, single-flight, snapshots and persistent JSON state)
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def load_json(path, default=None):
+    """Load JSON state from disk, returning default if missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except Exception as e:
+        logger.error(f"Error loading state from {path}: {str(e)}")
+        return default
+
+def save_json(path, data):
+    """Atomically write JSON state to disk"""
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write to a temp file first so a crash never leaves half a file behind
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        return True
+
+    except Exception as e:
+        logger.error(f"Error saving state to {path}: {str(e)}")
+        return False
+
+class PersistentState:
+    """Small JSON-backed key/value store for state that must survive restarts"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = load_json(path, {}) or {}
+
+    def get(self, key, default=None):
+        """Get a copy of the stored value, so callers can't mutate the saved state"""
+        with self._lock:
+            return copy.deepcopy(self._data.get(key, default))
+
+    def set(self, key, value):
+        """Store a value and persist the whole state"""
+        with self._lock:
+            self._data[key] = copy.deepcopy(value)
+            save_json(self.path, self._data)
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key, default=None):
+        """Get a live value, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry[1]:
+                if entry is not None:
+                    del self._entries[key]
+                self.stats['misses'] += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entries past maxsize"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def delete(self, key):
+        """Remove a key if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """Return a copy of the hit/miss/eviction counters plus the current size"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+        return stats
+
+class _InFlightCall:
+    """A call that other callers with the same key are waiting on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """Run func once per key at a time; concurrent callers share its result or exception"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+class _SharedStream:
+    """A stream that other callers with the same key are reading along"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.pieces = []
+        self.finished = False
+        self.error = None
+
+class StreamFlight:
+    """
+    Collapse concurrent streams with the same key into one producer
+
+    The first caller runs the generator; callers that arrive while it is
+    running replay the pieces produced so far and then follow along as new
+    ones arrive, so everyone sees the same stream from one execution.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._streams = {}
+
+    def stream(self, key, func, *args, **kwargs):
+        """Yield func's pieces, running func once per key at a time"""
+        with self._lock:
+            shared = self._streams.get(key)
+            leader = shared is None
+            if leader:
+                shared = _SharedStream()
+                self._streams[key] = shared
+
+        if leader:
+            yield from self._produce(key, shared, func, *args, **kwargs)
+        else:
+            yield from self._follow(shared)
+
+    def _produce(self, key, shared, func, *args, **kwargs):
+        try:
+            for piece in func(*args, **kwargs):
+                with shared.condition:
+                    shared.pieces.append(piece)
+                    shared.condition.notify_all()
+                yield piece
+        except Exception as e:
+            shared.error = e
+            raise
+        finally:
+            with self._lock:
+                self._streams.pop(key, None)
+            with shared.condition:
+                shared.finished = True
+                shared.condition.notify_all()
+
+    @staticmethod
+    def _follow(shared):
+        index = 0
+        while True:
+            with shared.condition:
+                shared.condition.wait_for(lambda: len(shared.pieces) > index or shared.finished)
+                pieces = shared.pieces[index:]
+                finished = shared.finished and index + len(pieces) == len(shared.pieces)
+
+            index += len(pieces)
+            yield from pieces
+
+            if finished:
+                if shared.error:
+                    raise shared.error
+                return
+
+class SharedSnapshot:
+    """
+    A value built once per refresh window and shared by every caller
+
+    Concurrent callers that find the snapshot stale wait for a single
+    in-flight build instead of each running the builder (single-flight).
+    The snapshot is persisted to disk so a restart can serve it warm. A
+    build that raises leaves the previous snapshot in place, and callers
+    keep getting it without another build until retry_interval has passed.
+    """
+
+    def __init__(self, name, builder, ttl, path=None, retry_interval=300):
+        self.name = name
+        self.builder = builder
+        self.ttl = ttl
+        self.path = path
+        self.retry_interval = retry_interval
+        self._data = None
+        self._built_at = 0
+        self._failed_at = 0
+        self._build_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresh_thread = None
+
+        self._load()
+
+    def _load(self):
+        """Restore the last snapshot from disk"""
+        if not self.path:
+            return
+
+        state = load_json(self.path)
+        if state and 'data' in state:
+            self._data = state['data']
+            self._built_at = state.get('built_at', 0)
+            logger.info(f"Loaded {self.name} snapshot from disk (age {int(self.age())}s)")
+
+    def age(self):
+        """Seconds since the snapshot was last built"""
+        return time.time() - self._built_at
+
+    def is_fresh(self, max_age=None):
+        """Check if the snapshot exists and is younger than max_age (defaults to the TTL)"""
+        max_age = self.ttl if max_age is None else max_age
+        return self._data is not None and self.age() < max_age
+
+    def _backing_off(self):
+        """Check if the last build failed less than retry_interval ago"""
+        return time.time() - self._failed_at < self.retry_interval
+
+    def get(self):
+        """Return the current snapshot, rebuilding it if the window has expired"""
+        if self.is_fresh() or self._backing_off():
+            return self._data
+        return self.refresh(max_age=self.ttl)
+
+    def refresh(self, max_age=0):
+        """Rebuild the snapshot unless it is younger than max_age"""
+        with self._build_lock:
+            # Another caller may have finished (or failed) a build while we were waiting
+            if self.is_fresh(max_age) or (max_age and self._backing_off()):
+                return self._data
+
+            started = time.time()
+            try:
+                data = self.builder()
+            except Exception as e:
+                logger.error(f"Error building {self.name} snapshot, retrying in {self.retry_interval}s: {str(e)}")
+                # Keep serving the previous snapshot if we have one
+                self._failed_at = time.time()
+                return self._data
+
+            self._failed_at = 0
+            self._data = data
+            self._built_at = time.time()
+            logger.info(f"Built {self.name} snapshot in {self._built_at - started:.2f}s")
+
+            if self.path:
+                save_json(self.path, {'built_at': self._built_at, 'data': data})
+
+            return self._data
+
+    def start_background_refresh(self, interval=None):
+        """Keep the snapshot warm from a daemon thread"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+
+        # Refresh well before the TTL expires so callers never hit a cold build
+        interval = interval or self.ttl / 2
+
+        def run():
+            self.refresh(max_age=interval)
+            while not self._stop_event.wait(interval):
+                self.refresh(max_age=interval)
+
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(target=run, name=f"{self.name}-refresh", daemon=True)
+        self._refresh_thread.start()
+        logger.info(f"Started background refresh for {self.name} snapshot every {int(interval)}s")
+
+    def stop_background_refresh(self):
+        """Stop the background refresh thread"""
+        self._stop_event.set()
@@ -22,10 +22,94 @@ if not all([TELEGRAM_TOKEN, OPENAI_API_KEY, SUPABASE_URL, SUPABASE_KEY]):
     raise EnvironmentError(f"Missing required environment variables: {', '.join(missing)}")
 
 
+# Bot concurrency
+BOT_CONCURRENT_UPDATES = 64  # Telegram updates handled at the same time
+BLOCKING_MAX_WORKERS = 32  # Threads for blocking DB, scraping and OpenAI calls
+
+# User cache settings
+USER_CACHE_TTL = 300  # Seconds a cached user row is trusted
+USER_CACHE_MAX_ENTRIES = 10000  # User rows kept in memory
+
+# Feedback logging settings
+FEEDBACK_BATCH_SIZE = 100  # Events per bulk insert
+FEEDBACK_FLUSH_INTERVAL = 5  # Seconds between flushes of queued feedback
+
+# Storage for snapshots and other local state
+DATA_DIR = os.getenv('DATA_DIR', 'data')
+
+# HTTP Settings
+HTTP_TIMEOUT = 10  # Seconds to wait for a response (read timeout)
+HTTP_CONNECT_TIMEOUT = 5  # Seconds to establish a connection
+HTTP_POOL_SIZE = 32  # Keep-alive connections kept per host
+HTTP_MAX_HOSTS = 64  # Hosts with their own connection pool
+HTTP_HOST_MAX_CONCURRENCY = 16  # Requests in flight to one host at a time
+HTTP_MAX_RETRIES = 2  # Retries on connection errors, timeouts and 429/5xx
+HTTP_BACKOFF_BASE = 0.5  # Seconds; retry delays are jittered up to base * 2^attempt
+HTTP_BACKOFF_MAX = 10  # Longest wait before a retry
+
 # News Service Settings
 NEWS_UPDATE_TIME = "22:00"  # 10 PM in 24-hour format
+# Headline keywords; whole words, a trailing * matches any word starting with the term,
+# a leading * any word ending with it (case-sensitive, so '*AI' catches OpenAI/xAI/GenAI)
+NEWS_AI_TERMS = ['ai', '*AI', 'artificial intelligence', 'machine learning', 'ml', 'deep learning',
+                 'neural network*', 'gpt*', 'llm*', 'large language model*']
+NEWS_FUNDING_TERMS = ['fund*', 'invest*', 'raise*', 'raising', 'capital', 'venture*', 'million*',
+                      'billion*', 'series', 'seed', 'acquisition*', 'acquires', 'acquired']
+HN_API_BASE = "https://hacker-news.firebaseio.com/v0"
+HN_TOP_STORIES_LIMIT = 100  # Top stories scanned for AI funding news
+HN_MAX_WORKERS = 32  # Concurrent HackerNews item requests
+NEWS_RSS_FEEDS = {
+    'TechCrunch': "https://techcrunch.com/feed/",
+}
+NEWS_FEED_MAX_AGE = 3 * 24 * 3600  # Feed items older than this are not read
+FEED_CHUNK_SIZE = 16 * 1024  # Bytes read per chunk when streaming feeds
+SOURCE_TIMEOUT = 30  # Seconds each news source may take before it is skipped
+SOURCE_MAX_WORKERS = 8  # News sources fetched at the same time
+SOURCE_FAILURE_THRESHOLD = 3  # Consecutive failures before a source's circuit opens
+SOURCE_RESET_TIMEOUT = 600  # Seconds before an open circuit lets a trial fetch through
+NEWS_SUMMARY_MODE = os.getenv('NEWS_SUMMARY_MODE', 'single')  # 'single' completion, or 'map_reduce' (opt-in)
+NEWS_MAX_ITEMS = int(os.getenv('NEWS_MAX_ITEMS', '10'))  # Articles included in each summary (and marked delivered)
+NEWS_SNAPSHOT_TTL = 3600  # Seconds a shared news snapshot is reused
+NEWS_SNAPSHOT_RETRY_INTERVAL = 300  # Seconds before a failed news snapshot build is retried
+NEWS_TITLE_MAX_DISTANCE = 3  # Max differing SimHash bits for two titles to be the same story
+DELIVERED_NEWS_MAX_AGE = 7 * 24 * 3600  # Seconds a delivered story is remembered
+NEWS_EXTRACTION_DEADLINE = 20  # Seconds allowed for extracting all articles of a summary
+NEWS_EXTRACTION_WORKERS = 10  # Articles extracted in parallel
+ARTICLE_MAX_CHARS = 3000  # Useful characters extracted per article; reading stops after this
+ARTICLE_MAX_BYTES = 2 * 1024 * 1024  # HTML read per article before extraction gives up
+CONTENT_CACHE_TTL = 6 * 3600  # Seconds before cached article text is revalidated
+CONTENT_CACHE_MAX_BYTES = 20 * 1024 * 1024  # In-memory budget for cached article text
+CONTENT_CACHE_DISK_MAX_AGE = 7 * 24 * 3600  # Seconds before on-disk entries are discarded
+CONTENT_CACHE_DISK_MAX_BYTES = 200 * 1024 * 1024  # On-disk budget for cached article text
+CONTENT_FAILURE_TTL = 600  # Seconds a URL whose fetch failed is not requested again
+SUMMARY_CACHE_TTL = 3600  # Seconds a generated summary is reused for identical prompts
+SUMMARY_CACHE_MAX_ENTRIES = 256  # Distinct summaries kept in memory
+NEWS_SUMMARY_MODEL = "gpt-4o-mini"  # OpenAI model for news summaries
+NEWS_PROMPT_TOKEN_BUDGET = 6000  # Tokens of article text sent per news summary
+ARTICLE_PROMPT_TOKEN_BUDGET = 1000  # Tokens of article text sent per article summary (map step)
+ARTICLE_SUMMARY_MAX_TOKENS = 150  # Completion tokens per article summary
+ARTICLE_SUMMARY_WORKERS = 8  # Article summaries requested in parallel
+ARTICLE_SUMMARY_CACHE_TTL = 24 * 3600  # Seconds an article summary is reused
+ARTICLE_SUMMARY_CACHE_MAX_ENTRIES = 1024  # Article summaries kept in memory
+NEWS_REDUCE_BASE_TOKENS = 300  # Completion tokens for the briefing's intro and link list (reduce step)
+NEWS_REDUCE_TOKENS_PER_ARTICLE = 120  # Extra completion tokens per article in the briefing (10 articles = 1500)
+
+# Scheduled delivery settings
+TELEGRAM_GLOBAL_RATE = 25  # Messages per second across all chats (Telegram allows ~30)
+TELEGRAM_PER_CHAT_INTERVAL = 1.0  # Seconds between messages to the same chat
+DELIVERY_WORKERS = 20  # Concurrent sender tasks
+DELIVERY_SUMMARY_WORKERS = 4  # Group summaries generated at the same time
+DELIVERY_MAX_RETRIES = 5  # Retries per message on 429 or network errors
+TELEGRAM_EDIT_INTERVAL = 1.5  # Seconds between edits of a message being streamed
+NEWS_STREAMING = os.getenv('NEWS_STREAMING', 'true').lower() == 'true'  # Stream /news summaries as they are written
 
 # Twitter Service Settings
+TWITTER_SNAPSHOT_TTL = 3600  # Seconds a shared tweet list is reused
+TWITTER_SEARCH_MAX_BYTES = 1024 * 1024  # Bytes read per search results page
+TWITTER_SEARCH_URL = os.getenv('TWITTER_SEARCH_URL', "https://www.google.com/search?q={query}")  # {query} is URL-quoted
+TWITTER_SEARCH_RATE = 2  # Search requests per second across all workers
+TWITTER_SEARCH_BURST = 5  # Search requests allowed back to back before the rate applies
+TWITTER_SEARCH_WORKERS = 5  # Experts searched at the same time
 TWITTER_VOICES = [
     "Sam Altman",
     "Elon Musk",
@@ -0,0 +1,170 @@
+# content_cache.py - Cache of extracted article text keyed by normalized URL
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from cache import load_json, save_json
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class ContentCache:
+    """
+    Size-bounded LRU of extracted article text, backed by an on-disk store
+
+    Entries are dicts with the extracted 'text', the 'etag' and
+    'last_modified' validators from the response, the original response
+    size in 'bytes' and 'fetched_at'. Entries older than the TTL are kept so
+    they can be revalidated with a conditional GET instead of refetched;
+    prune() drops disk entries past disk_max_age or beyond disk_max_bytes.
+    """
+
+    def __init__(self, directory, ttl, max_bytes, disk_max_age, disk_max_bytes=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.disk_max_age = disk_max_age
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'revalidated': 0,
+            'misses': 0,
+            'bytes_downloaded': 0,
+            'bytes_saved': 0
+        }
+
+    def _path(self, key):
+        """Path of the on-disk entry for a key"""
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def _remember(self, key, entry):
+        """Insert an entry into the memory LRU, evicting the oldest entries past the byte limit"""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._size -= len(old['text'])
+
+            self._entries[key] = entry
+            self._size += len(entry['text'])
+
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted['text'])
+
+    def get(self, key):
+        """Get a cached entry (fresh or stale) from memory or disk"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = load_json(self._path(key))
+        if not entry:
+            return None
+
+        # Drop disk entries too old to be worth revalidating
+        if time.time() - entry.get('fetched_at', 0) > self.disk_max_age:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+
+        self._remember(key, entry)
+        return entry
+
+    def prune(self):
+        """
+        Remove on-disk entries older than disk_max_age, then the least
+        recently written ones until the store fits in disk_max_bytes
+
+        Entries are rewritten whenever they are fetched or revalidated, so
+        file modification time is their age. Returns the number removed.
+        """
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith('.json')]
+        except FileNotFoundError:
+            return 0
+
+        files = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        # Oldest first
+        files.sort()
+        cutoff = time.time() - self.disk_max_age
+        total = sum(size for _, size, _ in files)
+
+        removed = 0
+        for modified_at, size, path in files:
+            if modified_at >= cutoff and (self.disk_max_bytes is None or total <= self.disk_max_bytes):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"Pruned {removed} article cache entries from disk ({total / 1024 / 1024:.1f} MiB left)")
+        return removed
+
+    def is_fresh(self, entry):
+        """Check if an entry can be served without revalidation"""
+        return time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    def put(self, key, text, etag=None, last_modified=None, size=0):
+        """Store freshly extracted text"""
+        entry = {
+            'text': text,
+            'etag': etag,
+            'last_modified': last_modified,
+            'bytes': size,
+            'fetched_at': time.time()
+        }
+        self._remember(key, entry)
+        save_json(self._path(key), entry)
+        return entry
+
+    def touch(self, key, entry):
+        """Mark an entry as fresh again after a 304 Not Modified"""
+        entry['fetched_at'] = time.time()
+        self._remember(key, entry)
+        save_json(self._path(key), entry)
+
+    def conditional_headers(self, entry):
+        """Build the revalidation headers for a stale entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, stat, amount=1):
+        """Increment a cache counter"""
+        with self._lock:
+            self.stats[stat] += amount
+
+    def get_stats(self):
+        """Return a copy of the cache counters plus the current memory usage"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['memory_bytes'] = self._size
+        return stats
@@ -4,7 +4,15 @@ from supabase import create_client
 import logging
 from datetime import datetime
 import json
-from config import SUPABASE_URL, SUPABASE_KEY, DEFAULT_NEWS_SYSTEM_MESSAGE, DEFAULT_TWITTER_SYSTEM_MESSAGE
+import os
+import atexit
+import threading
+from config import (
+    SUPABASE_URL, SUPABASE_KEY, DEFAULT_NEWS_SYSTEM_MESSAGE, DEFAULT_TWITTER_SYSTEM_MESSAGE,
+    DATA_DIR, USER_CACHE_TTL, USER_CACHE_MAX_ENTRIES, FEEDBACK_BATCH_SIZE, FEEDBACK_FLUSH_INTERVAL
+)
+from cache import TTLCache
+from feedback_sink import FeedbackSink
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
@@ -16,15 +24,58 @@ from supabase.lib.client_options import ClientOptions
 options = ClientOptions()
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY, options=options)
 
+# User rows shared by every preference reader; writes refresh or invalidate them
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL)
+
+# Count Supabase round trips so cache effectiveness can be measured
+_query_count = 0
+_query_count_lock = threading.Lock()
+
+def _execute(query):
+    """Execute a Supabase query, counting the round trip"""
+    global _query_count
+    with _query_count_lock:
+        _query_count += 1
+    return query.execute()
+
+def _cache_user(user):
+    """Store a fresh user row in the cache (write-through)"""
+    user_cache.set(str(user['id']), user)
+    return user
+
+def _store_updated_user(user_id, response):
+    """Write an updated row through to the cache, or drop the stale entry"""
+    if response.data:
+        return _cache_user(response.data[0])
+    user_cache.delete(str(user_id))
+    return None
+
+def get_user_cache_stats():
+    """Get user cache counters and the number of Supabase round trips so far"""
+    stats = user_cache.get_stats()
+    stats['queries'] = _query_count
+    return stats
+
+def get_user(user_id):
+    """Get a user row from the cache or the database, without creating it"""
+    cached = user_cache.get(str(user_id))
+    if cached is not None:
+        return cached
+    
+    response = _execute(supabase.table('users').select('*').eq('id', str(user_id)))
+    if response.data:
+        return _cache_user(response.data[0])
+    return None
+
 def get_or_create_user(user_id, username=None, first_name=None):
     """Get user data or create if not exists"""
     try:
         # Try to get the user
-        response = supabase.table('users').select('*').eq('id', str(user_id)).execute()
+        user = get_user(user_id)
         
-        if response.data and len(response.data) > 0:
+        if user:
             logger.info(f"Found existing user: {user_id}")
-            return response.data[0]
+            return user
         
         # User doesn't exist, create new
         logger.info(f"Creating new user: {user_id}")
@@ -42,9 +93,9 @@ def get_or_create_user(user_id, username=None, first_name=None):
             }
         }
         
-        response = supabase.table('users').insert(user_data).execute()
+        response = _execute(supabase.table('users').insert(user_data))
         if response.data and len(response.data) > 0:
-            return response.data[0]
+            return _cache_user(response.data[0])
         else:
             logger.error(f"Failed to create user: {user_id}")
             return None
@@ -53,56 +104,78 @@ def get_or_create_user(user_id, username=None, first_name=None):
         logger.error(f"Database error in get_or_create_user: {str(e)}")
         return None
 
-def update_user_service_choice(user_id, service_type):
-    """Update the user's service choice (news or twitter)"""
+def get_all_users(page_size=1000):
+    """
+    Yield every user row, fetching one page at a time
+    
+    Raises if any page can't be read, so callers never mistake a partial
+    read for the full user list.
+    """
+    start = 0
+    
+    while True:
+        try:
+            response = _execute(supabase.table('users').select('*').order('id').range(start, start + page_size - 1))
+        except Exception as e:
+            logger.error(f"Database error in get_all_users at row {start}: {str(e)}")
+            raise
+        
+        rows = response.data or []
+        yield from rows
+        
+        if len(rows) < page_size:
+            return
+        start += page_size
+
+def patch_user_preferences(user_id, set_keys=None, append=None, remove=None):
+    """
+    Atomically patch a user's preferences in one round trip
+    
+    set_keys is merged into preferences, while append/remove map array keys
+    to items to add or drop. The merge happens server-side in the
+    patch_user_preferences SQL function (sql/patch_user_preferences.sql),
+    so concurrent updates never overwrite each other.
+    """
     try:
-        response = supabase.table('users').update({
-            "preferences": {
-                "service_type": service_type
-            }
-        }).eq('id', str(user_id)).execute()
-        
-        return response.data[0] if response.data else None
+        response = _execute(supabase.rpc('patch_user_preferences', {
+            'p_user_id': str(user_id),
+            'p_set': set_keys or {},
+            'p_append': append or {},
+            'p_remove': remove or {}
+        }))
+        
+        if not response.data:
+            logger.error(f"No preferences found for user: {user_id}")
+        return _store_updated_user(user_id, response)
         
     except Exception as e:
-        logger.error(f"Database error in update_user_service_choice: {str(e)}")
+        logger.error(f"Database error in patch_user_preferences: {str(e)}")
+        user_cache.delete(str(user_id))
         return None
 
+def update_user_service_choice(user_id, service_type):
+    """Update the user's service choice (news or twitter)"""
+    return patch_user_preferences(user_id, set_keys={"service_type": service_type})
+
 def update_user_system_message(user_id, service_type, system_message):
     """Update the user's customized system message for the specified service"""
-    try:
-        # First get current preferences
-        response = supabase.table('users').select('preferences').eq('id', str(user_id)).execute()
-        if not response.data or not response.data[0].get('preferences'):
-            logger.error(f"No preferences found for user: {user_id}")
-            return None
-            
-        # Update the specific system message while preserving other preferences
-        preferences = response.data[0]['preferences']
-        
-        if service_type == 'news':
-            preferences['news_system_message'] = system_message
-        elif service_type == 'twitter':
-            preferences['twitter_system_message'] = system_message
-        
-        # Save updated preferences
-        response = supabase.table('users').update({
-            "preferences": preferences
-        }).eq('id', str(user_id)).execute()
-        
-        return response.data[0] if response.data else None
-        
-    except Exception as e:
-        logger.error(f"Database error in update_user_system_message: {str(e)}")
+    if service_type == 'news':
+        key = 'news_system_message'
+    elif service_type == 'twitter':
+        key = 'twitter_system_message'
+    else:
+        logger.error(f"Unknown service type for system message: {service_type}")
         return None
+    
+    return patch_user_preferences(user_id, set_keys={key: system_message})
 
 def get_user_system_message(user_id, service_type):
     """Get the user's customized system message for the specified service"""
     try:
-        response = supabase.table('users').select('preferences').eq('id', str(user_id)).execute()
+        user = get_user(user_id)
         
-        if response.data and response.data[0].get('preferences'):
-            preferences = response.data[0]['preferences']
+        if user and user.get('preferences'):
+            preferences = user['preferences']
             
             if service_type == 'news':
                 return preferences.get('news_system_message', DEFAULT_NEWS_SYSTEM_MESSAGE)
@@ -125,46 +198,30 @@ def get_user_system_message(user_id, service_type):
 
 def update_excluded_items(user_id, service_type, item, add=True):
     """Add or remove an excluded item (topic/twitter account) for a user"""
-    try:
-        # First get current preferences
-        response = supabase.table('users').select('preferences').eq('id', str(user_id)).execute()
-        if not response.data or not response.data[0].get('preferences'):
-            logger.error(f"No preferences found for user: {user_id}")
-            return None
-            
-        # Update the excluded items while preserving other preferences
-        preferences = response.data[0]['preferences']
-        
-        if service_type == 'news':
-            excluded_list = preferences.get('excluded_topics', [])
-        else:  # twitter
-            excluded_list = preferences.get('excluded_twitter_accounts', [])
-        
-        # Add or remove item
-        if add and item not in excluded_list:
-            excluded_list.append(item)
-        elif not add and item in excluded_list:
-            excluded_list.remove(item)
-        
-        # Update the list in preferences
-        if service_type == 'news':
-            preferences['excluded_topics'] = excluded_list
-        else:  # twitter
-            preferences['excluded_twitter_accounts'] = excluded_list
-        
-        # Save updated preferences
-        response = supabase.table('users').update({
-            "preferences": preferences
-        }).eq('id', str(user_id)).execute()
-        
-        return response.data[0] if response.data else None
-        
-    except Exception as e:
-        logger.error(f"Database error in update_excluded_items: {str(e)}")
-        return None
+    if service_type == 'news':
+        key = 'excluded_topics'
+    else:  # twitter
+        key = 'excluded_twitter_accounts'
+    
+    if add:
+        return patch_user_preferences(user_id, append={key: [item]})
+    return patch_user_preferences(user_id, remove={key: [item]})
+
+def _insert_feedback_rows(rows):
+    """Bulk insert feedback rows; raises so the sink can spill them on failure"""
+    _execute(supabase.table('user_feedback').insert(rows))
+
+# Feedback is queued and written in bulk off the handler path
+feedback_sink = FeedbackSink(
+    _insert_feedback_rows,
+    spill_path=os.path.join(DATA_DIR, 'feedback_spill.jsonl'),
+    batch_size=FEEDBACK_BATCH_SIZE,
+    flush_interval=FEEDBACK_FLUSH_INTERVAL
+)
+atexit.register(feedback_sink.close)
 
 def log_user_feedback(user_id, service_type, content_id, feedback_type, feedback_reason=None):
-    """Log user feedback on content"""
+    """Log user feedback on content (queued and written in bulk)"""
     try:
         feedback_data = {
             "user_id": str(user_id),
@@ -175,9 +232,9 @@ def log_user_feedback(user_id, service_type, content_id, feedback_type, feedback
             "created_at": datetime.now().isoformat()
         }
         
-        response = supabase.table('user_feedback').insert(feedback_data).execute()
-        return response.data[0] if response.data else None
+        feedback_sink.submit(feedback_data)
+        return feedback_data
         
     except Exception as e:
-        logger.error(f"Database error in log_user_feedback: {str(e)}")
-        return None
\ No newline at end of file
+        logger.error(f"Error in log_user_feedback: {str(e)}")
+        return None
@@ -0,0 +1,160 @@
+# dedup.py - Cross-source deduplication and the "already delivered" index
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+from cache import load_json, save_json
+from url_utils import normalize_url, unwrap_redirect_url
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TITLE_TOKEN_PATTERN = re.compile(r'\w+')
+TITLE_STOPWORDS = {'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with', 'by', 'at',
+                   'from', 'as', 'is', 'its', 'it', 'that', 'this', 'new'}
+
+def canonical_url(url):
+    """Canonical form of an article URL: unwrapped, normalized, without www/AMP variants"""
+    url = normalize_url(unwrap_redirect_url(url))
+    parts = urlsplit(url)
+
+    host = parts.netloc
+    if host.startswith('www.'):
+        host = host[4:]
+
+    path = parts.path
+    if path.endswith('/amp'):
+        path = path[:-4] or '/'
+
+    # http and https versions of a page are the same story
+    return urlunsplit(('https', host, path, parts.query, ''))
+
+def title_fingerprint(title):
+    """64-bit SimHash of a title's words and word pairs"""
+    words = [word for word in TITLE_TOKEN_PATTERN.findall(title.lower()) if word not in TITLE_STOPWORDS]
+    features = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+    if not features:
+        return 0
+
+    weights = [0] * 64
+    for feature in features:
+        feature_hash = int.from_bytes(hashlib.md5(feature.encode()).digest()[:8], 'big')
+        for bit in range(64):
+            weights[bit] += 1 if feature_hash >> bit & 1 else -1
+
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def title_names(title):
+    """Capitalized words of a title (company and investor names, acronyms), lowercased"""
+    return frozenset(word.lower() for word in TITLE_TOKEN_PATTERN.findall(title)
+                     if word[0].isupper() and word.lower() not in TITLE_STOPWORDS)
+
+def is_near_duplicate(fingerprint, other, max_distance):
+    """Check if two title fingerprints differ in at most max_distance bits"""
+    return bin(fingerprint ^ other).count('1') <= max_distance
+
+def is_same_story(fingerprint, names, other, other_names, max_distance):
+    """
+    Check if two titles are the same story
+
+    Templated headlines ("Lumen raises $20M Series A for AI agents") hash
+    close together whoever raised, so near-identical fingerprints only
+    count when neither title has a name the other lacks. Names are None
+    when unknown (entries saved before names were kept).
+    """
+    if not is_near_duplicate(fingerprint, other, max_distance):
+        return False
+    if names is None or other_names is None:
+        return True
+    return not (names - other_names and other_names - names)
+
+def deduplicate_news(news_items, max_distance):
+    """
+    Drop repeated stories across sources, keeping the first occurrence
+
+    Two items are the same story if their canonical URLs match or their
+    titles are the same story by is_same_story.
+    """
+    seen_urls = set()
+    seen_titles = []
+    unique_items = []
+
+    for item in news_items:
+        url = canonical_url(item['url'])
+        fingerprint = title_fingerprint(item['title'])
+        names = title_names(item['title'])
+
+        if url in seen_urls or any(is_same_story(fingerprint, names, seen, seen_names, max_distance)
+                                   for seen, seen_names in seen_titles):
+            logger.info(f"Dropping duplicate story from {item['source']}: {item['title']}")
+            continue
+
+        seen_urls.add(url)
+        seen_titles.append((fingerprint, names))
+        unique_items.append(item)
+
+    return unique_items
+
+class DeliveredIndex:
+    """Persistent record of stories already delivered, so they are not summarized again"""
+
+    def __init__(self, path, max_age, max_distance):
+        self.path = path
+        self.max_age = max_age
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+
+        state = load_json(path, {}) or {}
+        self._urls = state.get('urls', {})
+        self._fingerprints = {int(fingerprint): delivered_at
+                              for fingerprint, delivered_at in state.get('fingerprints', {}).items()}
+        self._names = {int(fingerprint): frozenset(names) for fingerprint, names in state.get('names', {}).items()}
+        self._prune()
+
+    def _prune(self):
+        """Forget stories delivered longer ago than max_age"""
+        cutoff = time.time() - self.max_age
+        self._urls = {url: delivered_at for url, delivered_at in self._urls.items() if delivered_at >= cutoff}
+        self._fingerprints = {fingerprint: delivered_at for fingerprint, delivered_at in self._fingerprints.items()
+                              if delivered_at >= cutoff}
+        self._names = {fingerprint: names for fingerprint, names in self._names.items()
+                       if fingerprint in self._fingerprints}
+
+    def is_delivered(self, item):
+        """Check if an item (or a near-identical title) was already delivered"""
+        with self._lock:
+            if canonical_url(item['url']) in self._urls:
+                return True
+            fingerprint = title_fingerprint(item['title'])
+            names = title_names(item['title'])
+            return any(is_same_story(fingerprint, names, delivered, self._names.get(delivered), self.max_distance)
+                       for delivered in self._fingerprints)
+
+    def filter_new(self, news_items):
+        """Keep only items that were not delivered before"""
+        new_items = [item for item in news_items if not self.is_delivered(item)]
+        skipped = len(news_items) - len(new_items)
+        if skipped:
+            logger.info(f"Skipped {skipped} already delivered news items")
+        return new_items
+
+    def mark_delivered(self, news_items):
+        """Record items as delivered and persist the index"""
+        now = time.time()
+        with self._lock:
+            for item in news_items:
+                fingerprint = title_fingerprint(item['title'])
+                self._urls[canonical_url(item['url'])] = now
+                self._fingerprints[fingerprint] = now
+                self._names[fingerprint] = title_names(item['title'])
+            self._prune()
+            save_json(self.path, {
+                'urls': self._urls,
+                'fingerprints': {str(fingerprint): delivered_at for fingerprint, delivered_at in self._fingerprints.items()},
+                'names': {str(fingerprint): sorted(names) for fingerprint, names in self._names.items()}
+            })
@@ -0,0 +1,299 @@
+# delivery.py - Daily fan-out delivery of summaries to all users
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from telegram.error import RetryAfter, Forbidden, BadRequest, TimedOut, NetworkError
+
+from config import (
+    DATA_DIR, NEWS_MAX_ITEMS, DEFAULT_NEWS_SYSTEM_MESSAGE, DEFAULT_TWITTER_SYSTEM_MESSAGE,
+    TELEGRAM_GLOBAL_RATE, TELEGRAM_PER_CHAT_INTERVAL, DELIVERY_WORKERS, DELIVERY_SUMMARY_WORKERS, DELIVERY_MAX_RETRIES
+)
+from db import get_all_users
+from exclusions import exclusion_key, exclude_news
+from news_service import get_news_snapshot, generate_news_summary, mark_news_delivered
+from twitter_service import fetch_top_tweets, filter_tweets, generate_twitter_summary
+from utils import generate_content_id, split_long_message, run_blocking, TokenBucket
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class DeliveryCheckpoint:
+    """
+    Append-only record of the users already served in one daily run
+
+    Each delivered user ID is appended and flushed immediately, so a run
+    that crashes halfway resumes without re-sending to anyone.
+    """
+
+    COMPLETE_MARKER = '__complete__'
+
+    def __init__(self, run_date):
+        self.path = os.path.join(DATA_DIR, 'delivery', f"{run_date}.log")
+        self.delivered = set()
+        self.complete = False
+        self._load()
+
+    def _load(self):
+        """Read the users already delivered in this run"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = line.strip()
+                if entry == self.COMPLETE_MARKER:
+                    self.complete = True
+                elif entry:
+                    self.delivered.add(entry)
+
+    def is_started(self):
+        """Check if this run has already delivered to someone"""
+        return os.path.exists(self.path)
+
+    def _append(self, entry):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f"{entry}\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def mark_delivered(self, user_id):
+        """Record a user as served"""
+        self.delivered.add(str(user_id))
+        self._append(str(user_id))
+
+    def mark_complete(self):
+        """Record that every user in the run was handled"""
+        self.complete = True
+        self._append(self.COMPLETE_MARKER)
+
+class TelegramSender:
+    """Send messages within Telegram's global and per-chat rate limits, retrying on 429"""
+
+    def __init__(self, bot, rate=TELEGRAM_GLOBAL_RATE, per_chat_interval=TELEGRAM_PER_CHAT_INTERVAL,
+                 max_retries=DELIVERY_MAX_RETRIES):
+        self.bot = bot
+        self.bucket = TokenBucket(rate)
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+
+    async def send(self, chat_id, text, reply_markup=None):
+        """Send one message, returning True if it was delivered"""
+        delay = 1
+
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire_async()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup)
+                return True
+
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                logger.warning(f"Rate limited sending to {chat_id}, retrying in {retry_after}s")
+                await asyncio.sleep(retry_after)
+
+            except (Forbidden, BadRequest) as e:
+                # Blocked the bot, deleted account, etc. - retrying won't help
+                logger.warning(f"Cannot deliver to {chat_id}: {str(e)}")
+                return False
+
+            except (TimedOut, NetworkError) as e:
+                logger.warning(f"Network error sending to {chat_id} (attempt {attempt + 1}): {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+
+        logger.error(f"Giving up on {chat_id} after {self.max_retries + 1} attempts")
+        return False
+
+    async def send_parts(self, chat_id, parts, reply_markup=None):
+        """Send a split message in order, spacing parts by the per-chat interval"""
+        for index, part in enumerate(parts):
+            if index:
+                await asyncio.sleep(self.per_chat_interval)
+
+            # Feedback buttons go on the last part only
+            markup = reply_markup if index == len(parts) - 1 else None
+            if not await self.send(chat_id, part, markup):
+                return False
+
+        return True
+
+def delivery_group_key(user):
+    """Users with the same service, system message and exclusions get the same summary"""
+    preferences = user.get('preferences') or {}
+    service_type = preferences.get('service_type')
+
+    if service_type == 'news':
+        system_message = preferences.get('news_system_message', DEFAULT_NEWS_SYSTEM_MESSAGE)
+        exclusions = preferences.get('excluded_topics', [])
+    else:
+        system_message = preferences.get('twitter_system_message', DEFAULT_TWITTER_SYSTEM_MESSAGE)
+        exclusions = preferences.get('excluded_twitter_accounts', [])
+
+    message_hash = hashlib.sha256((system_message or '').encode()).hexdigest()
+    return (service_type, message_hash, exclusion_key(exclusions))
+
+def group_users(users):
+    """Group users that have chosen a service by their delivery key"""
+    groups = {}
+    for user in users:
+        preferences = user.get('preferences') or {}
+        if preferences.get('service_type') not in ('news', 'twitter'):
+            continue
+        groups.setdefault(delivery_group_key(user), []).append(user)
+    return groups
+
+def build_group_summary(group_key, representative, shared):
+    """
+    Generate the one summary shared by every user in a group
+
+    Returns (summary, content ID, news items the summary covers); the item
+    list is empty for tweets.
+    """
+    service_type = group_key[0]
+    preferences = representative.get('preferences') or {}
+
+    if service_type == 'news':
+        news_items = exclude_news(shared['news'](), preferences.get('excluded_topics', []))
+        if not news_items:
+            return None, None, []
+        summary = generate_news_summary(representative['id'], news_items)
+        return summary, generate_content_id(news_items), news_items[:NEWS_MAX_ITEMS]
+
+    tweets = filter_tweets(shared['tweets'](), preferences.get('excluded_twitter_accounts', []))
+    if not tweets:
+        return None, None, []
+    return generate_twitter_summary(representative['id'], tweets), generate_content_id(tweets), []
+
+# One delivery run at a time, so the daily job and a startup resume can't both send
+_delivery_lock = asyncio.Lock()
+
+async def run_daily_delivery(bot, feedback_markup, run_date=None):
+    """
+    Deliver the daily summary to every user
+
+    Users are paged from the database and grouped so each distinct
+    (service, system message, exclusions) combination is summarized once.
+    Summaries are built a few groups at a time, messages go through a
+    bounded pool of sender workers that share one rate limiter, and every
+    delivery is checkpointed. Runs are serialized: a run that starts while
+    another is going waits for it, then serves only the users still left.
+    """
+    run_date = run_date or datetime.now().strftime('%Y-%m-%d')
+
+    if _delivery_lock.locked():
+        logger.info(f"Daily delivery already running, waiting before delivering for {run_date}")
+
+    async with _delivery_lock:
+        await _run_daily_delivery(bot, feedback_markup, run_date)
+
+async def _run_daily_delivery(bot, feedback_markup, run_date):
+    """Deliver one run while holding the delivery lock"""
+    checkpoint = DeliveryCheckpoint(run_date)
+    if checkpoint.complete:
+        logger.info(f"Daily delivery for {run_date} already complete")
+        return
+
+    try:
+        users = await run_blocking(lambda: list(get_all_users()))
+    except Exception as e:
+        # Without the full user list the run must not be marked complete
+        logger.error(f"Daily delivery for {run_date} aborted, could not read users: {str(e)}")
+        return
+
+    pending = [user for user in users if str(user['id']) not in checkpoint.delivered]
+    groups = group_users(pending)
+    logger.info(f"Delivering to {len(pending)} users in {len(groups)} groups "
+                f"({len(checkpoint.delivered)} already delivered)")
+
+    # Source data is fetched at most once per run, whatever the number of groups
+    shared_cache = {}
+    shared_lock = threading.Lock()
+    def shared(name, loader):
+        def load():
+            with shared_lock:
+                if name not in shared_cache:
+                    shared_cache[name] = loader()
+                return shared_cache[name]
+        return load
+    shared_sources = {'news': shared('news', get_news_snapshot), 'tweets': shared('tweets', fetch_top_tweets)}
+
+    sender = TelegramSender(bot)
+    queue = asyncio.Queue(maxsize=DELIVERY_WORKERS * 2)
+    stats = {'sent': 0, 'failed': 0}
+
+    # News items each group's summary covered, and how many of its users received it
+    group_deliveries = []
+
+    async def worker():
+        while True:
+            user_id, parts, markup, delivery = await queue.get()
+            try:
+                if await sender.send_parts(user_id, parts, markup):
+                    checkpoint.mark_delivered(user_id)
+                    delivery['sent'] += 1
+                    stats['sent'] += 1
+                else:
+                    stats['failed'] += 1
+            except Exception as e:
+                logger.error(f"Error delivering to {user_id}: {str(e)}")
+                stats['failed'] += 1
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(DELIVERY_WORKERS)]
+
+    # Summaries for different groups are independent; build a few at a time
+    summary_slots = asyncio.Semaphore(DELIVERY_SUMMARY_WORKERS)
+
+    async def deliver_group(group_key, group):
+        async with summary_slots:
+            try:
+                summary, content_id, items = await run_blocking(build_group_summary, group_key, group[0],
+                                                                shared_sources)
+            except Exception as e:
+                logger.error(f"Error building summary for group {group_key[:2]}: {str(e)}")
+                return
+
+        if not summary:
+            logger.info(f"Nothing to send for group {group_key[:2]} ({len(group)} users)")
+            return
+
+        parts = split_long_message(summary)
+        markup = feedback_markup(content_id)
+        delivery = {'items': items, 'sent': 0}
+        group_deliveries.append(delivery)
+        for user in group:
+            await queue.put((user['id'], parts, markup, delivery))
+
+    try:
+        await asyncio.gather(*(deliver_group(group_key, group) for group_key, group in groups.items()))
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+
+    # Stories someone received today shouldn't come back tomorrow
+    delivered_items = {}
+    for delivery in group_deliveries:
+        if delivery['sent']:
+            for item in delivery['items']:
+                delivered_items.setdefault(item['id'], item)
+    if delivered_items:
+        await run_blocking(mark_news_delivered, list(delivered_items.values()))
+
+    checkpoint.mark_complete()
+    logger.info(f"Daily delivery for {run_date} finished: {stats['sent']} sent, {stats['failed']} failed")
+
+def has_unfinished_delivery(run_date=None):
+    """Check if today's delivery started but did not finish (e.g. the bot crashed)"""
+    checkpoint = DeliveryCheckpoint(run_date or datetime.now().strftime('%Y-%m-%d'))
+    return checkpoint.is_started() and not checkpoint.complete
@@ -0,0 +1,57 @@
+# exclusions.py - Per-user exclusion filters for tweets and news, compiled once per exclusion list
+
+import functools
+import re
+from keyword_matcher import KeywordMatcher
+
+# Fields of a news item an excluded topic is looked for in (the fetchers set no company or topic field)
+NEWS_EXCLUSION_FIELDS = ('title', 'source')
+
+NON_HANDLE_PATTERN = re.compile(r'[^a-z0-9_]')
+
+def normalize_account(account):
+    """Normalize a handle or display name: '@ElonMusk', 'elonmusk' and 'Elon Musk' are the same"""
+    return NON_HANDLE_PATTERN.sub('', (account or '').lower())
+
+def exclusion_key(exclusions):
+    """Order- and case-insensitive key for an exclusion list, usable as a cache key"""
+    return tuple(sorted({item.strip().lower() for item in exclusions or [] if item and item.strip()}))
+
+@functools.lru_cache(maxsize=4096)
+def _compile_accounts(key):
+    return frozenset(filter(None, (normalize_account(account) for account in key)))
+
+@functools.lru_cache(maxsize=4096)
+def _compile_topics(key):
+    return KeywordMatcher({'excluded': key}) if key else None
+
+def compile_account_exclusions(excluded_accounts):
+    """Normalized set of excluded accounts (shared by users with the same list)"""
+    return _compile_accounts(exclusion_key(excluded_accounts))
+
+def compile_topic_exclusions(excluded_topics):
+    """Word-boundary matcher for excluded topics, or None (shared by users with the same list)"""
+    return _compile_topics(exclusion_key(excluded_topics))
+
+def exclude_tweets(tweets, excluded_accounts):
+    """Drop tweets whose handle or author name is excluded"""
+    excluded = compile_account_exclusions(excluded_accounts)
+    if not excluded:
+        return list(tweets)
+
+    return [
+        tweet for tweet in tweets
+        if normalize_account(tweet.get('username')) not in excluded
+        and normalize_account(tweet.get('name')) not in excluded
+    ]
+
+def exclude_news(news_items, excluded_topics):
+    """Drop news items whose title or source mentions an excluded topic"""
+    matcher = compile_topic_exclusions(excluded_topics)
+    if matcher is None:
+        return list(news_items)
+
+    return [
+        item for item in news_items
+        if not matcher.match(' | '.join(str(item[field]) for field in NEWS_EXCLUSION_FIELDS if item.get(field)))
+    ]
@@ -0,0 +1,171 @@
+# feed_parser.py - Streaming RSS/Atom feed reader
+
+import logging
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ENTRY_TAGS = {'item', 'entry'}
+
+class FeedTruncated(Exception):
+    """The feed stopped parsing part-way; the entries before the error were already yielded"""
+
+def _local_name(tag):
+    """Strip the XML namespace from a tag"""
+    return tag.rsplit('}', 1)[-1]
+
+def parse_feed_date(value):
+    """Parse an RSS (RFC 822) or Atom (ISO 8601) date into an aware datetime, or None"""
+    if not value:
+        return None
+    value = value.strip()
+
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _parse_entry(element):
+    """Normalize an RSS <item> or Atom <entry> into a dict"""
+    fields = {}
+    link = None
+
+    for child in element:
+        name = _local_name(child.tag)
+        if name == 'link':
+            # RSS puts the URL in the text, Atom in href (prefer rel="alternate")
+            href = child.get('href')
+            if href:
+                if link is None or child.get('rel', 'alternate') == 'alternate':
+                    link = href
+            elif child.text and link is None:
+                link = child.text.strip()
+        elif name not in fields:
+            fields[name] = (child.text or '').strip()
+
+    title = fields.get('title')
+    if not title or not link:
+        return None
+
+    return {
+        'guid': fields.get('guid') or fields.get('id') or link,
+        'title': title,
+        'url': link,
+        'published': parse_feed_date(fields.get('pubDate') or fields.get('published')
+                                     or fields.get('updated') or fields.get('date'))
+    }
+
+def iter_feed_items(chunks, cutoff=None):
+    """
+    Yield normalized entries from an RSS or Atom feed as its bytes arrive
+
+    Each entry is a dict with guid, title, url and published (an aware
+    datetime or None). Entries are dropped from the tree as soon as they
+    are read, so memory stays flat however large the feed is. Feeds list
+    newest items first, so reading stops at the first entry older than
+    cutoff. Malformed XML raises FeedTruncated after the entries read
+    before the error have been yielded.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stack = []
+
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            for entry in _read_entries(parser, stack):
+                if cutoff and entry['published'] and entry['published'] < cutoff:
+                    logger.info(f"Reached feed items older than {cutoff.date()}, stopping")
+                    return
+                yield entry
+
+        parser.close()
+
+    except ET.ParseError as e:
+        # Malformed XML (e.g. an undefined &nbsp; entity): hand out what was read before it
+        for entry in _read_entries(parser, stack):
+            if cutoff and entry['published'] and entry['published'] < cutoff:
+                return
+            yield entry
+        raise FeedTruncated(str(e)) from e
+
+def _read_entries(parser, stack):
+    """Yield the entries completed by the events the parser has produced so far"""
+    for event, element in parser.read_events():
+        if event == 'start':
+            stack.append(element)
+            continue
+
+        stack.pop()
+        if _local_name(element.tag) not in ENTRY_TAGS:
+            continue
+
+        entry = _parse_entry(element)
+
+        # Free the entry; nothing else references it once it is out of its parent
+        if stack:
+            stack[-1].remove(element)
+
+        if entry is not None:
+            yield entry
+
+# Benchmark against the previous BeautifulSoup-based parsing
+if __name__ == "__main__":
+    import sys
+    import time
+    import tracemalloc
+    from datetime import timedelta
+    from bs4 import BeautifulSoup
+
+    if len(sys.argv) > 1:
+        feeds = {path: open(path, 'rb').read() for path in sys.argv[1:]}
+    else:
+        # Synthetic newest-first feed with one item per hour
+        now = datetime.now(timezone.utc)
+        items = ''.join(
+            f"<item><title>Story {i} about AI funding</title><link>https://example.com/{i}</link>"
+            f"<guid>https://example.com/{i}</guid>"
+            f"<pubDate>{(now - timedelta(hours=i)).strftime('%a, %d %b %Y %H:%M:%S %z')}</pubDate>"
+            f"<description>{'Lorem ipsum dolor sit amet. ' * 40}</description></item>"
+            for i in range(5000)
+        )
+        feeds = {'synthetic (5000 items)': f"<?xml version='1.0'?><rss><channel>{items}</channel></rss>".encode()}
+
+    def chunked(data, size=16384):
+        for start in range(0, len(data), size):
+            yield data[start:start + size]
+
+    def soup_parse(data):
+        soup = BeautifulSoup(data, 'xml')
+        return [(item.title.text, item.link.text,
+                 datetime.strptime(item.pubDate.text, "%a, %d %b %Y %H:%M:%S %z"))
+                for item in soup.find_all('item')]
+
+    def measure(func):
+        tracemalloc.start()
+        started = time.perf_counter()
+        count = len(func())
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return count, elapsed, peak
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=3)
+    for name, data in feeds.items():
+        print(f"{name}: {len(data) / 1024:.0f} KiB")
+        for label, func in [
+            ('soup (full tree)', lambda: soup_parse(data)),
+            ('streaming', lambda: list(iter_feed_items(chunked(data)))),
+            ('streaming, 3-day cutoff', lambda: list(iter_feed_items(chunked(data), cutoff))),
+        ]:
+            count, elapsed, peak = measure(func)
+            print(f"  {label:24} {count:6} items  {elapsed:7.3f}s  peak {peak / 1024 / 1024:7.1f} MiB")
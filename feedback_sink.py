@@ -0,0 +1,130 @@
+# feedback_sink.py - Buffered, bulk-writing sink for feedback events
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class FeedbackSink:
+    """
+    Queue events in memory and write them in bulk from a background thread
+
+    A batch is flushed when it reaches batch_size or every flush_interval
+    seconds, whichever comes first. If the writer fails (e.g. Supabase is
+    unreachable) the batch is appended to a local spill file and replayed
+    on a later flush, so no event is lost.
+    """
+
+    def __init__(self, writer, spill_path, batch_size=100, flush_interval=5):
+        self.writer = writer
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background flush thread"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='feedback-sink', daemon=True)
+        self._thread.start()
+
+    def submit(self, event):
+        """Queue an event; returns immediately"""
+        self._queue.put(event)
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+
+    def _run(self):
+        deadline = time.monotonic() + self.flush_interval
+        while not self._stop_event.is_set():
+            # Wake up early once a full batch is waiting
+            if self._queue.qsize() >= self.batch_size or time.monotonic() >= deadline:
+                self.flush()
+                deadline = time.monotonic() + self.flush_interval
+            self._stop_event.wait(0.1)
+
+    def _drain(self):
+        """Take everything currently queued"""
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _read_spill(self):
+        """Load and clear events spilled by earlier failed flushes"""
+        if not os.path.exists(self.spill_path):
+            return []
+
+        events = []
+        # A crash mid-spill can leave a partial line; skip it rather than block every later flush
+        with open(self.spill_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError as e:
+                    logger.error(f"Skipping unreadable feedback spill line {line_number}: {str(e)}")
+        os.remove(self.spill_path)
+        return events
+
+    def _spill(self, events):
+        """Append events to the local spill file"""
+        directory = os.path.dirname(self.spill_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def flush(self):
+        """Write all queued (and previously spilled) events in bulk"""
+        with self._flush_lock:
+            try:
+                events = self._read_spill() + self._drain()
+            except Exception as e:
+                logger.error(f"Error reading feedback spill file: {str(e)}")
+                events = self._drain()
+
+            if not events:
+                return 0
+
+            written = 0
+            for start in range(0, len(events), self.batch_size):
+                batch = events[start:start + self.batch_size]
+                try:
+                    self.writer(batch)
+                    written += len(batch)
+                except Exception as e:
+                    logger.error(f"Error writing {len(batch)} feedback events, spilling to disk: {str(e)}")
+                    self._spill(events[start:])
+                    break
+
+            if written:
+                logger.info(f"Flushed {written} feedback events")
+            return written
+
+    def close(self):
+        """Stop the background thread and flush whatever is left"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
@@ -0,0 +1,204 @@
+# http_client.py - Shared HTTP session for outbound requests
+
+import codecs
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from config import (
+    HTTP_TIMEOUT, HTTP_CONNECT_TIMEOUT, HTTP_POOL_SIZE, HTTP_MAX_HOSTS, HTTP_HOST_MAX_CONCURRENCY,
+    HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# urllib3 decodes brotli responses only when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; AINewsBot/1.0)',
+    'Accept-Encoding': ACCEPT_ENCODING
+}
+
+# Transient statuses worth another attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+_host_limits = {}
+_host_metrics = {}
+_hosts_lock = threading.Lock()
+
+def get_session():
+    """Return the process-wide keep-alive session, creating it on first use"""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+
+                # One connection pool per host (up to HTTP_MAX_HOSTS pools), each
+                # keeping enough connections alive for the concurrent fetchers
+                adapter = HTTPAdapter(pool_connections=HTTP_MAX_HOSTS, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+
+                _session = session
+
+    return _session
+
+def _host_state(host):
+    """Concurrency cap and metrics for a host, created on first use"""
+    with _hosts_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(HTTP_HOST_MAX_CONCURRENCY)
+            _host_metrics[host] = {
+                'requests': 0,
+                'errors': 0,
+                'retries': 0,
+                'last_status': None,
+                'last_latency': None,
+                'avg_latency': None
+            }
+        return _host_limits[host], _host_metrics[host]
+
+def _record(metrics, latency=None, status=None, error=False):
+    """Update a host's counters and smoothed latency"""
+    with _hosts_lock:
+        metrics['requests'] += 1
+        if error:
+            metrics['errors'] += 1
+        if status is not None:
+            metrics['last_status'] = status
+        if latency is not None:
+            metrics['last_latency'] = round(latency, 3)
+            average = metrics['avg_latency']
+            metrics['avg_latency'] = round(latency if average is None else 0.8 * average + 0.2 * latency, 3)
+
+def _backoff(attempt, response=None):
+    """Seconds to wait before a retry: Retry-After if the server sent one, else jittered exponential"""
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(int(retry_after), HTTP_BACKOFF_MAX)
+
+    # Full jitter keeps retrying clients from hitting a host in lockstep
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+def request(method, url, timeout=None, max_retries=HTTP_MAX_RETRIES, **kwargs):
+    """
+    Send a request through the shared session
+
+    At most HTTP_HOST_MAX_CONCURRENCY requests per host are in flight at
+    once (counted until the response headers arrive). Connection errors,
+    timeouts and 429/5xx responses are retried with jittered exponential
+    backoff. The last response is returned even if its status is an error,
+    so callers still decide with raise_for_status().
+    """
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_TIMEOUT)
+    limit, metrics = _host_state(urlsplit(url).hostname or '')
+
+    for attempt in range(max_retries + 1):
+        started = time.monotonic()
+        try:
+            with limit:
+                response = get_session().request(method, url, timeout=timeout, **kwargs)
+
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _record(metrics, error=True)
+            if attempt == max_retries:
+                raise
+            delay = _backoff(attempt)
+            logger.warning(f"{method} {url} failed ({str(e)}), retrying in {delay:.1f}s")
+
+        else:
+            latency = time.monotonic() - started
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                _record(metrics, latency, response.status_code, error=response.status_code >= 500)
+                return response
+
+            _record(metrics, latency, response.status_code, error=True)
+            delay = _backoff(attempt, response)
+            response.close()
+            logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+
+        with _hosts_lock:
+            metrics['retries'] += 1
+        time.sleep(delay)
+
+def get(url, timeout=None, **kwargs):
+    """GET a URL through the shared session, always with a timeout"""
+    return request('GET', url, timeout=timeout, **kwargs)
+
+def get_host_metrics():
+    """Get per-host request, error and retry counts and latencies"""
+    with _hosts_lock:
+        return {host: dict(metrics) for host, metrics in _host_metrics.items()}
+
+# Content types worth downloading when we want page text
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+
+class UnsupportedContent(ValueError):
+    """The response is a type or size we refuse to download"""
+
+def response_charset(response, default='utf-8'):
+    """Charset declared in the Content-Type header, or default"""
+    content_type = response.headers.get('Content-Type', '')
+    for parameter in content_type.split(';')[1:]:
+        name, _, value = parameter.strip().partition('=')
+        if name.lower() == 'charset' and value:
+            return value.strip('"\'')
+    return default
+
+def iter_bounded_content(response, max_bytes, allowed_types=HTML_CONTENT_TYPES, chunk_size=16384):
+    """
+    Yield the body of a streamed response in chunks, within a byte budget
+
+    Raises UnsupportedContent before reading anything if the content type
+    isn't allowed (PDFs, videos, ...) or the declared length is over budget.
+    Bodies without a declared length stop quietly at max_bytes.
+    """
+    content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type and allowed_types and content_type not in allowed_types:
+        raise UnsupportedContent(f"Unsupported content type {content_type}")
+
+    declared_length = response.headers.get('Content-Length')
+    if declared_length and declared_length.isdigit() and int(declared_length) > max_bytes:
+        raise UnsupportedContent(f"Response of {declared_length} bytes exceeds the {max_bytes} byte budget")
+
+    bytes_read = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        remaining = max_bytes - bytes_read
+        if len(chunk) >= remaining:
+            yield chunk[:remaining]
+            logger.info(f"Stopped reading {response.url} at the {max_bytes} byte budget")
+            return
+        bytes_read += len(chunk)
+        yield chunk
+
+def fetch_text(url, max_bytes, allowed_types=HTML_CONTENT_TYPES, **kwargs):
+    """GET a URL and return its decoded body, reading at most max_bytes"""
+    response = get(url, stream=True, **kwargs)
+    try:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response_charset(response))(errors='replace')
+        text = ''.join(decoder.decode(chunk) for chunk in iter_bounded_content(response, max_bytes, allowed_types))
+        return text + decoder.decode(b'', final=True)
+    finally:
+        response.close()
@@ -0,0 +1,134 @@
+# keyword_matcher.py - Precompiled, word-boundary aware multi-term matcher
+
+import re
+
+class KeywordMatcher:
+    """
+    Match several named term sets against text in a single regex pass
+
+    Terms match as whole words ('ai' does not match "said", 'ml' does not
+    match "html"). A trailing '*' makes a term a word prefix, so 'fund*'
+    matches "fund", "funding" and "funded". A leading '*' makes a term the
+    end of a compound word, matched case-sensitively as written, so '*AI'
+    matches "OpenAI", "xAI" and "GenAI" but not "Dubai". Multi-word terms
+    match across any whitespace or hyphens ("machine-learning").
+    """
+
+    def __init__(self, term_sets):
+        self.term_sets = {category: list(terms) for category, terms in term_sets.items()}
+        self._groups = {}
+
+        alternatives = []
+        for category, terms in self.term_sets.items():
+            for index, term in enumerate(terms):
+                group = f"{category}_{index}"
+                self._groups[group] = (category, term.strip('*').lower())
+                alternatives.append((len(term), group, self._term_pattern(term)))
+
+        # Longer terms first so "machine learning" wins over any shorter overlap
+        alternatives.sort(key=lambda alternative: -alternative[0])
+        pattern = '|'.join(f"(?P<{group}>{term_pattern})" for _, group, term_pattern in alternatives)
+        self._regex = re.compile(rf"\b(?:{pattern})", re.IGNORECASE) if alternatives else None
+
+    @staticmethod
+    def _term_pattern(term):
+        """Regex fragment for one term"""
+        prefix = term.endswith('*')
+        if term.startswith('*'):
+            # Compound suffix: any word start, then the suffix with its exact case
+            return rf"\w*(?-i:{re.escape(term.strip('*'))})" + (r'\w*' if prefix else r'(?!\w)')
+
+        words = term.rstrip('*').lower().split()
+        fragment = r'[\s-]+'.join(re.escape(word) for word in words)
+        return fragment + (r'\w*' if prefix else r'(?!\w)')
+
+    def match(self, text):
+        """Return {category: set of matched terms} for every category that matched"""
+        matched = {}
+        if not self._regex or not text:
+            return matched
+
+        for found in self._regex.finditer(text):
+            category, term = self._groups[found.lastgroup]
+            matched.setdefault(category, set()).add(term)
+        return matched
+
+    def matches_all(self, text, categories=None):
+        """Check if text matches at least one term from every category"""
+        matched = self.match(text)
+        return all(matched.get(category) for category in (categories or self.term_sets))
+
+# Benchmark against the previous substring matching
+if __name__ == "__main__":
+    import random
+    import time
+
+    ai_terms = ['ai', 'artificial intelligence', 'machine learning', 'ml', 'deep learning',
+                'neural network', 'gpt', 'llm', 'large language model']
+    funding_terms = ['fund', 'invest', 'raise', 'capital', 'venture', 'million', 'billion',
+                     'series', 'seed', 'acquisition', 'acquires', 'acquired']
+
+    matcher = KeywordMatcher({
+        'ai': ['ai', '*AI', 'artificial intelligence', 'machine learning', 'ml', 'deep learning',
+               'neural network*', 'gpt*', 'llm*', 'large language model*'],
+        'funding': ['fund*', 'invest*', 'raise*', 'raising', 'capital', 'venture*', 'million*',
+                    'billion*', 'series', 'seed', 'acquisition*', 'acquires', 'acquired']
+    })
+
+    def substring_filter(title):
+        title_lower = title.lower()
+        return any(term in title_lower for term in ai_terms) and any(term in title_lower for term in funding_terms)
+
+    # Labelled headlines: True for AI funding news the bot must keep
+    labelled = [
+        ("OpenAI raises $6.6 billion at a $157 billion valuation", True),
+        ("xAI raises $6B in Series C", True),
+        ("GenAI startup lands $10M seed round", True),
+        ("Mistral AI raises €600M in Series B funding", True),
+        ("Anthropic gets $4B investment from Amazon", True),
+        ("Startup raises $5M for machine-learning platform", True),
+        ("LLM tooling company Langchain raises $25M Series A", True),
+        ("AI-powered CRM raises Series A led by Sequoia", True),
+        ("Deep learning chip maker closes $100 million funding round", True),
+        ("Nvidia acquires AI startup Run:ai", True),
+        ("Large language model startup Cohere raises $500M", True),
+        ("Artificial intelligence lab secures venture capital", True),
+        ("GPT-4 wrapper startup raises seed funding", True),
+        ("Neural networks startup raises $20M", True),
+        ("Dubai fund invests in luxury hotels", False),
+        ("He said funding for schools is up", False),
+        ("Shanghai retail chain raises prices", False),
+        ("Fundamental changes to HTML email standards", False),
+        ("MLB team acquired by investment group", False),
+        ("Chairman details capitalism critique", False),
+        ("Thai restaurant chain seeks capital", False),
+        ("Mail client raises privacy concerns", False),
+        ("Series of detailed investigations into retail", False),
+        ("Open source browser hits a million users", False),
+    ]
+
+    print(f"{'':10} {'recall':>7} {'precision':>9}  missed / wrongly kept")
+    for label, accepts in [('substring', substring_filter), ('compiled', matcher.matches_all)]:
+        kept = {title for title, _ in labelled if accepts(title)}
+        relevant = {title for title, is_relevant in labelled if is_relevant}
+        recall = len(kept & relevant) / len(relevant)
+        precision = len(kept & relevant) / len(kept) if kept else 1.0
+        print(f"{label:10} {recall:7.0%} {precision:9.0%}  {len(relevant - kept)} / {len(kept - relevant)}")
+        for title in sorted(relevant - kept):
+            print(f"    missed: {title}")
+        for title in sorted(kept - relevant):
+            print(f"    wrongly kept: {title}")
+
+    # Throughput on random headlines
+    vocabulary = ['startup', 'said', 'html', 'email', 'fundamental', 'detail', 'chair', 'raises',
+                  'AI', 'OpenAI', 'LLM', 'Series', 'B', 'funding', 'million', 'maintain', 'mlb', 'seedy',
+                  'capitalism', 'retail', 'investigation', 'open', 'source', 'browser', 'new', 'the']
+    random.seed(42)
+    headlines = [' '.join(random.choice(vocabulary) for _ in range(random.randint(5, 12)))
+                 for _ in range(100000)]
+
+    for label, accepts in [('substring', substring_filter), ('compiled', matcher.matches_all)]:
+        started = time.perf_counter()
+        hits = sum(1 for title in headlines if accepts(title))
+        elapsed = time.perf_counter() - started
+        print(f"{label}: {len(headlines)} headlines in {elapsed:.3f}s ({len(headlines) / elapsed:,.0f}/s), {hits} matches")
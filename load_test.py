@@ -0,0 +1,114 @@
+# load_test.py - Concurrent /news load test against stubbed services
+
+# Drives N concurrent /news commands through main.news_command with the
+# database, news snapshot and OpenAI calls replaced by blocking stubs that
+# sleep like the real ones. If the handlers blocked the event loop the
+# requests would serialize (wall time ~ N x per-request time); with the
+# executor bridge they overlap.
+#
+# Usage: python load_test.py [requests] [--no-streaming]
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# The stubs replace every external service; config only needs the variables to exist
+os.environ.setdefault('TELEGRAM_TOKEN', 'load-test')
+os.environ.setdefault('OPENAI_API_KEY', 'load-test')
+os.environ.setdefault('SUPABASE_URL', 'http://localhost:54321')
+os.environ.setdefault('SUPABASE_KEY', 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.load-test')
+
+import main
+from config import BLOCKING_MAX_WORKERS
+
+DB_LATENCY = 0.2  # Seconds per Supabase round trip
+SNAPSHOT_LATENCY = 0.1  # Seconds to read the shared news snapshot
+SUMMARY_LATENCY = 2.0  # Seconds for a full OpenAI completion
+STREAM_PIECES = 20  # Pieces a streamed completion arrives in
+
+in_flight = 0
+peak_in_flight = 0
+in_flight_lock = threading.Lock()
+
+def blocking_call(seconds):
+    """Sleep like a blocking client call, tracking how many run at the same time"""
+    global in_flight, peak_in_flight
+    with in_flight_lock:
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+    try:
+        time.sleep(seconds)
+    finally:
+        with in_flight_lock:
+            in_flight -= 1
+
+NEWS_ITEMS = [{'id': str(i), 'title': f"Startup {i} raises $10M for AI", 'url': f"https://example.com/{i}",
+               'source': 'HackerNews', 'date': '2026-01-01', 'content': 'Text.'} for i in range(10)]
+
+def get_or_create_user(user_id):
+    blocking_call(DB_LATENCY)
+    return {'id': user_id, 'preferences': {'service_type': 'news', 'excluded_topics': []}}
+
+def get_news_snapshot():
+    blocking_call(SNAPSHOT_LATENCY)
+    return NEWS_ITEMS
+
+def generate_news_summary(user_id, news_items):
+    blocking_call(SUMMARY_LATENCY)
+    return f"Summary for {user_id}"
+
+def stream_news_summary(user_id, news_items):
+    for index in range(STREAM_PIECES):
+        blocking_call(SUMMARY_LATENCY / STREAM_PIECES)
+        yield f"piece {index} "
+
+class FakeMessage:
+    """Just enough of telegram.Message for news_command"""
+
+    def __init__(self, text=''):
+        self.text = text
+
+    async def reply_text(self, text, reply_markup=None):
+        await asyncio.sleep(0.01)
+        return FakeMessage(text)
+
+    async def edit_text(self, text, reply_markup=None):
+        await asyncio.sleep(0.01)
+        self.text = text
+
+class FakeUpdate:
+    def __init__(self, user_id):
+        self.effective_user = type('User', (), {'id': user_id})()
+        self.message = FakeMessage()
+
+async def timed_command(user_id):
+    started = time.monotonic()
+    await main.news_command(FakeUpdate(user_id), None)
+    return time.monotonic() - started
+
+async def run(count):
+    started = time.monotonic()
+    durations = await asyncio.gather(*(timed_command(user_id) for user_id in range(count)))
+    wall = time.monotonic() - started
+
+    # What the same requests would take one after another
+    serial = count * (DB_LATENCY + SNAPSHOT_LATENCY + SUMMARY_LATENCY)
+    print(f"{count} concurrent /news requests ({'streaming' if main.NEWS_STREAMING else 'single reply'})")
+    print(f"  per request: min {min(durations):.2f}s, max {max(durations):.2f}s")
+    print(f"  wall time {wall:.2f}s vs {serial:.2f}s if serialized ({serial / wall:.1f}x overlap)")
+    print(f"  peak blocking calls in flight: {peak_in_flight} (executor has {BLOCKING_MAX_WORKERS} threads)")
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith('--')]
+    count = int(arguments[0]) if arguments else 20
+
+    main.get_or_create_user = get_or_create_user
+    main.get_news_snapshot = get_news_snapshot
+    main.generate_news_summary = generate_news_summary
+    main.stream_news_summary = stream_news_summary
+    if '--no-streaming' in sys.argv:
+        main.NEWS_STREAMING = False
+
+    asyncio.run(run(count))
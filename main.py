@@ -12,12 +12,15 @@ import datetime
 import pytz
 from tzlocal import get_localzone_name
 
-from config import TELEGRAM_TOKEN, NEWS_UPDATE_TIME
+from config import TELEGRAM_TOKEN, NEWS_UPDATE_TIME, BOT_CONCURRENT_UPDATES, NEWS_STREAMING
 from db import get_or_create_user, update_user_service_choice
-from news_service import fetch_ai_funding_news, generate_news_summary
-from twitter_service import fetch_top_tweets, filter_tweets, generate_twitter_summary
+from news_service import get_news_snapshot, news_snapshot, generate_news_summary, stream_news_summary
+from twitter_service import fetch_top_tweets, tweet_snapshot, filter_tweets, generate_twitter_summary
 from feedback_handler import process_feedback
-from utils import generate_content_id, split_long_message
+from exclusions import exclude_news
+from delivery import run_daily_delivery, has_unfinished_delivery
+from message_stream import StreamingMessage
+from utils import generate_content_id, split_long_message, run_blocking, iterate_blocking
 
 
 # Enable logging
@@ -46,7 +49,8 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     user = update.effective_user
     
     # Get or create user in database
-    db_user = get_or_create_user(
+    db_user = await run_blocking(
+        get_or_create_user,
         user.id, 
         username=user.username, 
         first_name=user.first_name
@@ -93,7 +97,7 @@ async def handle_service_choice(update: Update, context: ContextTypes.DEFAULT_TY
         return ConversationHandler.END
     
     # Update user preference in the database
-    update_user_service_choice(user_id, service_type)
+    await run_blocking(update_user_service_choice, user_id, service_type)
     
     logger.info(f"User {user_id} chose {service_name}")
     
@@ -111,29 +115,41 @@ async def news_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user_id = update.effective_user.id
     
     # Get or create user in database
-    db_user = get_or_create_user(user_id)
+    db_user = await run_blocking(get_or_create_user, user_id)
     
     # Get service preference (default to news if not set)
     service_type = db_user.get('preferences', {}).get('service_type', 'news')
     
-    await update.message.reply_text("Fetching your personalized summary... This might take a minute.")
+    placeholder = await update.message.reply_text("Fetching your personalized summary... This might take a minute.")
     
     # Generate the appropriate summary based on service type
     if service_type == 'news':
-        # Fetch AI funding news
-        news_items = fetch_ai_funding_news()
+        # Get AI funding news from the shared snapshot
+        news_items = await run_blocking(get_news_snapshot)
+        
+        # Drop stories about topics the user asked not to see
+        excluded_topics = db_user.get('preferences', {}).get('excluded_topics', [])
+        news_items = exclude_news(news_items, excluded_topics)
         
         if not news_items:
             await update.message.reply_text("Sorry, I couldn't find any relevant AI funding news today.")
             return
         
+        if NEWS_STREAMING:
+            # Write the summary into the placeholder as it is generated
+            message = StreamingMessage(placeholder)
+            async for piece in iterate_blocking(stream_news_summary, user_id, news_items):
+                await message.append(piece)
+            await message.finish(reply_markup=build_feedback_markup(generate_content_id(news_items)))
+            return
+        
         # Generate summary
-        summary = generate_news_summary(user_id, news_items)
+        summary = await run_blocking(generate_news_summary, user_id, news_items)
         content_id = generate_content_id(news_items)
         
     else:  # Twitter
         # Fetch tweets from top voices
-        tweets = fetch_top_tweets()
+        tweets = await run_blocking(fetch_top_tweets)
         
         # Filter tweets based on user preferences
         excluded_accounts = db_user.get('preferences', {}).get('excluded_twitter_accounts', [])
@@ -154,20 +170,21 @@ async def news_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     for part in message_parts[:-1]:
         await update.message.reply_text(part)
     
-    # For the last part, add feedback buttons
+    # Send the last part with feedback buttons
+    await update.message.reply_text(
+        message_parts[-1], 
+        reply_markup=build_feedback_markup(content_id)
+    )
+
+def build_feedback_markup(content_id):
+    """Build the like/dislike buttons attached to a summary"""
     keyboard = [
         [
             InlineKeyboardButton("👍 Liked it", callback_data=f"{CB_LIKE}_{content_id}"),
             InlineKeyboardButton("👎 Didn't like it", callback_data=f"{CB_DISLIKE}_{content_id}")
         ]
     ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    # Send the last part with feedback buttons
-    await update.message.reply_text(
-        message_parts[-1], 
-        reply_markup=reply_markup
-    )
+    return InlineKeyboardMarkup(keyboard)
 
 async def handle_feedback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle feedback callback"""
@@ -183,12 +200,12 @@ async def handle_feedback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     content_id = parts[1] if len(parts) > 1 else None
     
     # Get user info
-    db_user = get_or_create_user(user_id)
+    db_user = await run_blocking(get_or_create_user, user_id)
     service_type = db_user.get('preferences', {}).get('service_type', 'news')
     
     if action == CB_LIKE:
         # Process positive feedback
-        response = process_feedback(user_id, service_type, content_id, 'positive')
+        response = await run_blocking(process_feedback, user_id, service_type, content_id, 'positive')
         await query.edit_message_text(response)
         return ConversationHandler.END
         
@@ -234,7 +251,7 @@ async def process_feedback_reason(update: Update, context: ContextTypes.DEFAULT_
         return ConversationHandler.END
     
     # Process the feedback
-    response = process_feedback(user_id, service_type, content_id, 'negative', feedback_reason)
+    response = await run_blocking(process_feedback, user_id, service_type, content_id, 'negative', feedback_reason)
     
     # Clean up stored data
     if user_id in user_feedback:
@@ -260,29 +277,40 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 async def send_scheduled_updates(context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send scheduled updates to all users"""
     logger.info("Sending scheduled updates")
-    
-    # In a real implementation, you would:
-    # 1. Query the database for all active users
-    # 2. Check their service preference
-    # 3. Generate and send appropriate updates
-    
-    # For this prototype, we'll use a placeholder
-    logger.info("Scheduled updates would be sent here")
-    
-    # Note: This requires implementing a separate function to get all users
-    # and their preferences from the database, then sending messages to each
+    await run_daily_delivery(context.bot, build_feedback_markup)
+
+async def resume_scheduled_updates(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Finish today's scheduled updates if a previous run was interrupted"""
+    if has_unfinished_delivery():
+        logger.info("Resuming interrupted scheduled updates")
+        await run_daily_delivery(context.bot, build_feedback_markup)
 
 def main() -> None:
     """Start the bot"""
-    # Create the Application WITHOUT a job queue
-    application = Application.builder().token(TELEGRAM_TOKEN).job_queue(None).build()
+    # Create the Application; blocking work runs on the shared executor
+    # so updates from different users are handled concurrently
+    application = (
+        Application.builder()
+        .token(TELEGRAM_TOKEN)
+        .concurrent_updates(BOT_CONCURRENT_UPDATES)
+        .build()
+    )
 
-    # application.job_queue.run_daily(
-    #     send_scheduled_updates,
-    #     time=datetime.time(hour=int(NEWS_UPDATE_TIME.split(':')[0]), 
-    #                     minute=int(NEWS_UPDATE_TIME.split(':')[1])),
-    #     days=(0, 1, 2, 3, 4, 5, 6)
-    # )
+    # Daily delivery at the configured local time
+    application.job_queue.run_daily(
+        send_scheduled_updates,
+        time=datetime.time(hour=int(NEWS_UPDATE_TIME.split(':')[0]), 
+                        minute=int(NEWS_UPDATE_TIME.split(':')[1]),
+                        tzinfo=pytz.timezone(get_localzone_name())),
+        days=(0, 1, 2, 3, 4, 5, 6)
+    )
+    
+    # Pick up a delivery run that was interrupted by a crash or restart
+    application.job_queue.run_once(resume_scheduled_updates, when=0)
+    
+    # Keep the shared news and tweet snapshots warm so /news never waits on a cold crawl
+    news_snapshot.start_background_refresh()
+    tweet_snapshot.start_background_refresh()
     
     # Conversation handler for the initial service choice
     conv_handler = ConversationHandler(
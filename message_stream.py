@@ -0,0 +1,87 @@
+# message_stream.py - Show text in a Telegram chat while it is still being generated
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from telegram.error import BadRequest, RetryAfter
+
+from config import TELEGRAM_EDIT_INTERVAL
+from utils import split_long_message
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class StreamingMessage:
+    """
+    A Telegram message that is edited in place as text arrives
+
+    Edits are throttled to one per edit_interval so a fast stream doesn't
+    hit Telegram's rate limits. When the text outgrows one message it is cut
+    where split_long_message would cut it, the finished part is left as is
+    and the rest continues in a new message.
+    """
+
+    def __init__(self, message, edit_interval=TELEGRAM_EDIT_INTERVAL, max_length=4000):
+        self.current = message  # Message being edited (e.g. a "Fetching..." placeholder)
+        self.last = message  # Newest message in the chat, replied to on rollover
+        self.edit_interval = edit_interval
+        self.max_length = max_length
+        self.text = ''
+        self.part = ''
+        self._shown = message.text
+        self._next_edit = 0.0
+
+    async def append(self, piece):
+        """Add streamed text, editing the message if the last edit was long enough ago"""
+        self.text += piece
+        self.part += piece
+
+        parts = split_long_message(self.part, self.max_length)
+        for finished in parts[:-1]:
+            await self._show(finished, force=True)
+            self.current = None
+        self.part = parts[-1]
+
+        await self._show(self.part)
+
+    async def finish(self, reply_markup=None):
+        """Show the complete text, with reply_markup on the last message"""
+        await self._show(self.part, force=True, reply_markup=reply_markup)
+        return self.text
+
+    async def _show(self, text, force=False, reply_markup=None):
+        if not text.strip():
+            return
+        if not force and time.monotonic() < self._next_edit:
+            return
+
+        while True:
+            try:
+                if self.current is None:
+                    self.current = await self.last.reply_text(text, reply_markup=reply_markup)
+                    self.last = self.current
+                elif text != self._shown or reply_markup is not None:
+                    await self.current.edit_text(text, reply_markup=reply_markup)
+                self._shown = text
+                break
+
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                logger.warning(f"Rate limited while streaming, waiting {retry_after}s")
+                if not force:
+                    self._next_edit = time.monotonic() + retry_after
+                    return
+                await asyncio.sleep(retry_after)
+
+            except BadRequest as e:
+                # Nothing changed since the last edit
+                if 'not modified' not in str(e).lower():
+                    raise
+                break
+
+        self._next_edit = time.monotonic() + self.edit_interval
@@ -1,13 +1,36 @@
 # news_service.py - AI Funding News Service
 
-import requests
 import logging
 import hashlib
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+import functools
+import codecs
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
 from openai import OpenAI
-from config import OPENAI_API_KEY
+from config import (
+    OPENAI_API_KEY, DATA_DIR, NEWS_AI_TERMS, NEWS_FUNDING_TERMS, HN_API_BASE, HN_TOP_STORIES_LIMIT, HN_MAX_WORKERS,
+    NEWS_RSS_FEEDS, NEWS_FEED_MAX_AGE, FEED_CHUNK_SIZE,
+    NEWS_MAX_ITEMS, NEWS_SNAPSHOT_TTL, NEWS_SNAPSHOT_RETRY_INTERVAL, NEWS_TITLE_MAX_DISTANCE, DELIVERED_NEWS_MAX_AGE, NEWS_EXTRACTION_DEADLINE, NEWS_EXTRACTION_WORKERS,
+    ARTICLE_MAX_CHARS, ARTICLE_MAX_BYTES, CONTENT_CACHE_TTL, CONTENT_CACHE_MAX_BYTES, CONTENT_CACHE_DISK_MAX_AGE,
+    CONTENT_CACHE_DISK_MAX_BYTES, CONTENT_FAILURE_TTL,
+    SUMMARY_CACHE_TTL, SUMMARY_CACHE_MAX_ENTRIES, NEWS_SUMMARY_MODEL, NEWS_PROMPT_TOKEN_BUDGET,
+    NEWS_SUMMARY_MODE, ARTICLE_PROMPT_TOKEN_BUDGET, ARTICLE_SUMMARY_MAX_TOKENS, ARTICLE_SUMMARY_WORKERS,
+    ARTICLE_SUMMARY_CACHE_TTL, ARTICLE_SUMMARY_CACHE_MAX_ENTRIES, NEWS_REDUCE_BASE_TOKENS, NEWS_REDUCE_TOKENS_PER_ARTICLE
+)
 from db import get_user_system_message
+from cache import SharedSnapshot, TTLCache, SingleFlight, StreamFlight, PersistentState
+from content_cache import ContentCache
+from keyword_matcher import KeywordMatcher
+from dedup import deduplicate_news, DeliveredIndex
+from sources import register_source, fetch_all_sources, PartialFetch
+from feed_parser import iter_feed_items, FeedTruncated
+from article_extractor import ArticleExtractor
+from prompt_builder import build_news_prompt
+from url_utils import normalize_url
+import http_client
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
@@ -17,180 +40,370 @@ logger = logging.getLogger(__name__)
 # Initialize OpenAI client
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+# Per-source cursors (seen stories, feed validators) persisted between runs
+source_state = PersistentState(os.path.join(DATA_DIR, 'source_state.json'))
+
+# Keyword matcher for AI funding headlines, compiled once
+news_matcher = KeywordMatcher({'ai': NEWS_AI_TERMS, 'funding': NEWS_FUNDING_TERMS})
+
+# Stories already delivered in the last few days
+delivered_index = DeliveredIndex(
+    os.path.join(DATA_DIR, 'delivered_news.json'),
+    max_age=DELIVERED_NEWS_MAX_AGE,
+    max_distance=NEWS_TITLE_MAX_DISTANCE
+)
+
+# Extracted article text, shared across snapshots and summaries
+content_cache = ContentCache(
+    os.path.join(DATA_DIR, 'content_cache'),
+    ttl=CONTENT_CACHE_TTL,
+    max_bytes=CONTENT_CACHE_MAX_BYTES,
+    disk_max_age=CONTENT_CACHE_DISK_MAX_AGE,
+    disk_max_bytes=CONTENT_CACHE_DISK_MAX_BYTES
+)
+
+# One fetch per article URL at a time, and a short memory of URLs that just failed
+content_flight = SingleFlight()
+failed_content = TTLCache(maxsize=1024, ttl=CONTENT_FAILURE_TTL)
+
+# Finished summaries keyed by (system message, article set), plus in-flight deduplication
+summary_cache = TTLCache(maxsize=SUMMARY_CACHE_MAX_ENTRIES, ttl=SUMMARY_CACHE_TTL)
+summary_flight = SingleFlight()
+summary_stream_flight = StreamFlight()
+
+# Per-article summaries for map-reduce mode, shared by every user
+article_summary_cache = TTLCache(maxsize=ARTICLE_SUMMARY_CACHE_MAX_ENTRIES, ttl=ARTICLE_SUMMARY_CACHE_TTL)
+article_summary_flight = SingleFlight()
+
 def fetch_ai_funding_news():
     """Fetch AI funding news from multiple sources"""
-    news_items = []
-    
-    # Add news from HackerNews
-    news_items.extend(fetch_from_hackernews())
-    
-    # Add news from TechCrunch
-    news_items.extend(fetch_from_techcrunch())
+    # Fetch all registered sources concurrently
+    news_items = fetch_all_sources()
     
     # Filter for AI funding news
     filtered_news = filter_ai_funding_news(news_items)
     
+    # Drop stories seen from more than one source, then anything already delivered
+    filtered_news = deduplicate_news(filtered_news, NEWS_TITLE_MAX_DISTANCE)
+    filtered_news = delivered_index.filter_new(filtered_news)
+    
     logger.info(f"Fetched {len(filtered_news)} AI funding news items")
     return filtered_news
 
-def fetch_from_hackernews():
-    """Fetch potential AI funding news from HackerNews"""
+def build_news_snapshot():
+    """Fetch the filtered news list and extract article bodies once for all users"""
+    news_items = fetch_ai_funding_news()
+    
+    # Only the articles that make it into a summary need their content
+    top_items = news_items[:NEWS_MAX_ITEMS]
+    for item, content in zip(top_items, extract_news_contents(top_items)):
+        # Articles that missed the deadline are left without content so summaries retry them
+        if content is not None:
+            item['content'] = content
+    
+    # Map step once per snapshot, so user requests only run the personalized reduce step
+    if NEWS_SUMMARY_MODE == 'map_reduce':
+        summarize_articles([dict(item, content=item.get('content') or '') for item in top_items])
+    
+    # Articles nobody asks for again would otherwise stay on disk forever
+    content_cache.prune()
+    
+    return news_items
+
+# Shared across all users; rebuilt at most once per refresh window
+news_snapshot = SharedSnapshot(
+    'news',
+    build_news_snapshot,
+    ttl=NEWS_SNAPSHOT_TTL,
+    path=os.path.join(DATA_DIR, 'news_snapshot.json'),
+    retry_interval=NEWS_SNAPSHOT_RETRY_INTERVAL
+)
+
+def mark_news_delivered(news_items):
+    """Record news items as delivered so later runs don't summarize them again"""
+    delivered_index.mark_delivered(news_items)
+
+def get_news_snapshot():
+    """Get the shared news items (with extracted content) for the current window"""
+    return news_snapshot.get() or []
+
+def fetch_hackernews_stories(base_url=HN_API_BASE, limit=HN_TOP_STORIES_LIMIT, max_workers=HN_MAX_WORKERS):
+    """
+    Fetch HackerNews top stories as news items; raises if the top list can't be fetched
+    
+    Stories already fetched by an earlier run are reused from the persisted
+    cursor state, so only story IDs that are new to the top list cost a
+    request.
+    """
     logger.info("Fetching from HackerNews")
-    news_items = []
     
-    try:
-        # Get top stories
-        response = requests.get("https://hacker-news.firebaseio.com/v0/topstories.json")
-        if response.status_code != 200:
-            logger.error(f"Failed to fetch HackerNews top stories: {response.status_code}")
-            return []
-            
-        # Take top 100 stories to increase chances of finding AI funding news
-        story_ids = response.json()[:100]
+    # Get top stories
+    response = http_client.get(f"{base_url}/topstories.json")
+    response.raise_for_status()
         
-        for story_id in story_ids:
-            try:
-                story_response = requests.get(f"https://hacker-news.firebaseio.com/v0/item/{story_id}.json")
-                if story_response.status_code != 200:
-                    continue
-                    
-                story = story_response.json()
-                
-                # Skip stories without title or URL
-                if not story.get('title') or not story.get('url'):
-                    continue
-                
-                # Create news item
-                news_items.append({
-                    'id': str(story_id),
-                    'title': story.get('title'),
-                    'url': story.get('url'),
-                    'source': 'HackerNews',
-                    'date': datetime.fromtimestamp(story.get('time', 0)).strftime('%Y-%m-%d')
-                })
-                
-            except Exception as e:
-                logger.error(f"Error processing HackerNews story {story_id}: {str(e)}")
-                continue
-                
-        logger.info(f"Fetched {len(news_items)} items from HackerNews")
-        return news_items
-        
-    except Exception as e:
-        logger.error(f"Error fetching from HackerNews: {str(e)}")
+    # Take top stories to increase chances of finding AI funding news
+    story_ids = [str(story_id) for story_id in response.json()[:limit]]
+    if not story_ids:
         return []
+        
+    # Known stories map to their news item, or None if they had no URL
+    known = source_state.get('hackernews', {}).get('items', {})
+    new_ids = [story_id for story_id in story_ids if story_id not in known]
+    
+    def fetch_new(story_id):
+        try:
+            return story_id, fetch_hackernews_item(story_id, base_url)
+        except Exception as e:
+            logger.error(f"Error processing HackerNews story {story_id}: {str(e)}")
+            return story_id, False
+    
+    # Fetch new items concurrently
+    fetched = {}
+    if new_ids:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(new_ids))) as executor:
+            fetched = dict(executor.map(fetch_new, new_ids))
+    
+    # Only remember stories that were fetched successfully, and only while they are in the top list
+    items = {}
+    for story_id in story_ids:
+        if story_id in known:
+            items[story_id] = known[story_id]
+        elif fetched.get(story_id) is not False:
+            items[story_id] = fetched.get(story_id)
+    source_state.set('hackernews', {'items': items})
+    
+    # Keep the original top-story order
+    news_items = [items[story_id] for story_id in story_ids if items.get(story_id)]
+            
+    logger.info(f"Fetched {len(news_items)} items from HackerNews ({len(new_ids)} new stories requested)")
+    return news_items
 
-def fetch_from_techcrunch():
-    """Fetch potential AI funding news from TechCrunch"""
-    logger.info("Fetching from TechCrunch")
-    news_items = []
+def fetch_hackernews_item(story_id, base_url=HN_API_BASE):
+    """Fetch a single HackerNews story as a news item (None if it has no title or URL); raises on fetch errors"""
+    story_response = http_client.get(f"{base_url}/item/{story_id}.json")
+    story_response.raise_for_status()
+        
+    story = story_response.json()
     
+    # Skip stories without title or URL
+    if not story or not story.get('title') or not story.get('url'):
+        return None
+    
+    # Create news item
+    return {
+        'id': str(story_id),
+        'title': story.get('title'),
+        'url': story.get('url'),
+        'source': 'HackerNews',
+        'date': datetime.fromtimestamp(story.get('time', 0)).strftime('%Y-%m-%d')
+    }
+
+def fetch_rss_feed(feed_url, source_name):
+    """
+    Fetch an RSS or Atom feed as news items; raises if the feed can't be fetched
+    
+    The feed is requested conditionally (ETag/Last-Modified), parsed as it
+    streams in, and items whose GUID was seen in an earlier run are reused
+    instead of rebuilt. A feed that breaks off part-way raises PartialFetch
+    with the items read before the error, and its validators aren't kept
+    so the next run downloads it in full.
+    """
+    logger.info(f"Fetching from {source_name}")
+    state_key = f"rss:{feed_url}"
+    state = source_state.get(state_key, {})
+    known = state.get('items', {})
+    
+    # Get RSS feed, unless it hasn't changed since the last run
+    headers = {}
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        headers['If-Modified-Since'] = state['last_modified']
+    
+    response = http_client.get(feed_url, headers=headers, stream=True)
     try:
-        # Get RSS feed
-        response = requests.get("https://techcrunch.com/feed/")
-        if response.status_code != 200:
-            logger.error(f"Failed to fetch TechCrunch RSS: {response.status_code}")
-            return []
-            
-        # Parse XML
-        soup = BeautifulSoup(response.content, 'xml')
-        items = soup.find_all('item')
+        if response.status_code == 304:
+            logger.info(f"{source_name} RSS not modified, reusing {len(known)} items")
+            return list(known.values())
+        response.raise_for_status()
+        
+        # Stream entries as they download and stop at the first one past the cutoff
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=NEWS_FEED_MAX_AGE)
+        entries = iter_feed_items(response.iter_content(chunk_size=FEED_CHUNK_SIZE), cutoff)
         
-        for item in items:
-            try:
-                # Get item details
-                title = item.title.text
-                link = item.link.text
-                pub_date = item.pubDate.text
+        feed_items = {}
+        new_count = 0
+        truncated = None
+        try:
+            for entry in entries:
+                guid = entry['guid']
                 
-                # Parse date
-                date_obj = datetime.strptime(pub_date, "%a, %d %b %Y %H:%M:%S %z")
-                date = date_obj.strftime('%Y-%m-%d')
+                # Already seen in an earlier run
+                if guid in known:
+                    feed_items[guid] = known[guid]
+                    continue
+                
+                title = entry['title']
+                link = entry['url']
+                published = entry['published'] or datetime.now(timezone.utc)
                 
                 # Create ID from title and link
                 item_id = hashlib.md5(f"{title}|{link}".encode()).hexdigest()
                 
                 # Create news item
-                news_items.append({
+                feed_items[guid] = {
                     'id': item_id,
                     'title': title,
                     'url': link,
-                    'source': 'TechCrunch',
-                    'date': date
-                })
-                
-            except Exception as e:
-                logger.error(f"Error processing TechCrunch item: {str(e)}")
-                continue
-                
-        logger.info(f"Fetched {len(news_items)} items from TechCrunch")
-        return news_items
-        
-    except Exception as e:
-        logger.error(f"Error fetching from TechCrunch: {str(e)}")
-        return []
+                    'source': source_name,
+                    'date': published.strftime('%Y-%m-%d')
+                }
+                new_count += 1
+        except FeedTruncated as e:
+            truncated = e
+    finally:
+        response.close()
+    
+    # Validators for a truncated parse would let a 304 serve the partial item set indefinitely
+    source_state.set(state_key, {
+        'etag': None if truncated else response.headers.get('ETag'),
+        'last_modified': None if truncated else response.headers.get('Last-Modified'),
+        'items': feed_items
+    })
+    
+    if truncated:
+        raise PartialFetch(list(feed_items.values()), f"malformed {source_name} feed: {str(truncated)}")
+    
+    logger.info(f"Fetched {len(feed_items)} items from {source_name} ({new_count} new)")
+    return list(feed_items.values())
+
+# Built-in sources; another RSS feed only needs an entry in NEWS_RSS_FEEDS
+register_source('HackerNews', fetch_hackernews_stories)
+for feed_name, feed_url in NEWS_RSS_FEEDS.items():
+    register_source(feed_name, functools.partial(fetch_rss_feed, feed_url, feed_name))
 
 def filter_ai_funding_news(news_items):
     """Filter news to only include AI funding related items"""
     ai_funding_items = []
     
-    # Define keywords for initial filtering
-    ai_terms = ['ai', 'artificial intelligence', 'machine learning', 'ml', 'deep learning',
-                'neural network', 'gpt', 'llm', 'large language model']
-                
-    funding_terms = ['fund', 'invest', 'raise', 'capital', 'venture', 'million', 'billion', 
-                     'series', 'seed', 'acquisition', 'acquires', 'acquired']
-    
-    # First-pass filtering based on keywords
+    # Single pass per title; titles must mention both an AI and a funding term
     for item in news_items:
-        title_lower = item['title'].lower()
-        
-        # Check if title contains both AI and funding terms
-        has_ai_term = any(term in title_lower for term in ai_terms)
-        has_funding_term = any(term in title_lower for term in funding_terms)
+        matched = news_matcher.match(item['title'])
         
-        if has_ai_term and has_funding_term:
+        if matched.get('ai') and matched.get('funding'):
+            item['matched_terms'] = sorted(matched['ai'] | matched['funding'])
             ai_funding_items.append(item)
-            logger.info(f"Identified AI funding news: {item['title']}")
+            logger.info(f"Identified AI funding news: {item['title']} ({', '.join(item['matched_terms'])})")
             
     logger.info(f"Filtered to {len(ai_funding_items)} AI funding news items")
     return ai_funding_items
 
 def get_news_content(url):
-    """Fetch and extract article content"""
+    """Fetch and extract article content, served from the content cache when possible"""
+    key = normalize_url(url)
+    entry = content_cache.get(key)
+    
+    # Fresh cache hit: no network at all
+    if entry and content_cache.is_fresh(entry):
+        content_cache.record('hits')
+        content_cache.record('bytes_saved', entry.get('bytes', 0))
+        return entry['text']
+    
+    # A publisher that just failed isn't asked again until CONTENT_FAILURE_TTL has passed
+    if failed_content.get(key):
+        return entry['text'] if entry else ""
+    
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (compatible; AINewsBot/1.0)'
-        }
+        # Revalidate stale entries with a conditional GET
+        headers = content_cache.conditional_headers(entry) if entry else {}
+        response = http_client.get(url, headers=headers, stream=True)
         
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove noise elements
-        for element in soup.select('nav, header, footer, aside, script, style, .ads, .comments'):
-            if element:
-                element.extract()
-        
-        # Try to find main article content
-        content_selectors = [
-            'article', '.article-content', '.entry-content', '.post-content',
-            '.article-body', 'main', '#content', '.story'
-        ]
+        try:
+            if entry and response.status_code == 304:
+                content_cache.touch(key, entry)
+                content_cache.record('revalidated')
+                content_cache.record('bytes_saved', entry.get('bytes', 0))
+                return entry['text']
+            
+            response.raise_for_status()
+            content_cache.record('misses')
+            
+            # Feed chunks straight into the extractor and stop once it has enough text
+            extractor = ArticleExtractor(max_chars=ARTICLE_MAX_CHARS, max_bytes=ARTICLE_MAX_BYTES)
+            decoder = codecs.getincrementaldecoder(http_client.response_charset(response))(errors='replace')
+            size = 0
+            for chunk in http_client.iter_bounded_content(response, ARTICLE_MAX_BYTES):
+                size += len(chunk)
+                extractor.feed(decoder.decode(chunk))
+                if extractor.done:
+                    break
+            
+            content_cache.record('bytes_downloaded', size)
+            text = extractor.text()
+        finally:
+            response.close()
         
-        for selector in content_selectors:
-            content = soup.select_one(selector)
-            if content and len(content.get_text(strip=True)) > 300:
-                return ' '.join(content.get_text(strip=True).split())
+        content_cache.put(
+            key,
+            text,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            size=size
+        )
+        return text
         
-        # Fallback to body content
-        body_text = soup.body.get_text(strip=True)
-        return ' '.join(body_text.split())
+    except http_client.UnsupportedContent as e:
+        logger.info(f"Skipping article content from {url}: {str(e)}")
+        # Remember the rejection so the same PDF/video isn't requested again
+        content_cache.put(key, "")
+        return ""
         
     except Exception as e:
         logger.error(f"Error fetching article content from {url}: {str(e)}")
-        return ""
+        failed_content.set(key, True)
+        # A stale copy is better than nothing
+        return entry['text'] if entry else ""
+
+def extract_news_contents(news_items, deadline=NEWS_EXTRACTION_DEADLINE, max_workers=NEWS_EXTRACTION_WORKERS):
+    """
+    Extract article content for several news items in parallel
+    
+    Returns one content string per item, in the same order as news_items.
+    Articles that are not ready when the global deadline expires come back
+    as None so the caller can use their title now and retry them later.
+    """
+    if not news_items:
+        return []
+    
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(news_items)))
+    futures = [executor.submit(_timed_get_news_content, item['url']) for item in news_items]
+    
+    done, not_done = wait(futures, timeout=deadline)
+    
+    contents = []
+    for item, future in zip(news_items, futures):
+        if future in done:
+            contents.append(future.result())
+        else:
+            logger.warning(f"Article extraction missed the {deadline}s deadline, using title only: {item['url']}")
+            contents.append(None)
+    
+    # Don't wait for stragglers; they (and any still queued) finish in the background and warm the content cache
+    executor.shutdown(wait=False)
+    
+    logger.info(f"Extracted {len(done)}/{len(news_items)} articles within the deadline")
+    return contents
+
+def _timed_get_news_content(url):
+    """Get article content and log how long the publisher took; concurrent requests for a URL share one fetch"""
+    started = time.monotonic()
+    content = content_flight.do(normalize_url(url), get_news_content, url)
+    logger.info(f"Extracted {len(content)} chars from {urlsplit(url).netloc} in {time.monotonic() - started:.2f}s: {url}")
+    return content
+
+def get_content_cache_stats():
+    """Get hit/miss/byte counters for the article content cache"""
+    return content_cache.get_stats()
 
 def generate_news_summary(user_id, news_items):
     """Generate a summary of AI funding news for a user"""
@@ -198,22 +411,133 @@ def generate_news_summary(user_id, news_items):
         logger.warning("No news items to summarize")
         return "No AI funding news found today."
     
+    system_message, top_items, cache_key = _news_summary_request(user_id, news_items)
+    
+    # Users with the same system message and article set share one completion
+    summary = summary_cache.get(cache_key)
+    if summary is not None:
+        logger.info("Serving news summary from cache")
+        return summary
+    
+    try:
+        return summary_flight.do(cache_key, _complete_news_summary, cache_key, system_message, top_items)
+        
+    except Exception as e:
+        logger.error(f"Error generating news summary: {str(e)}")
+        return "Sorry, I couldn't generate a summary at this time. Please try again later."
+
+def stream_news_summary(user_id, news_items):
+    """
+    Generate a news summary as a stream of text pieces
+    
+    Yields the completion as the model produces it, so the first words can
+    be shown after about a second instead of after the whole generation. A
+    cached summary is yielded in one piece. Concurrent requests for the same
+    prompt share one streamed completion, and the finished summary is cached
+    like generate_news_summary's.
+    """
+    if not news_items:
+        logger.warning("No news items to summarize")
+        yield "No AI funding news found today."
+        return
+    
+    produced = False
+    try:
+        system_message, top_items, cache_key = _news_summary_request(user_id, news_items)
+        
+        summary = summary_cache.get(cache_key)
+        if summary is not None:
+            logger.info("Serving news summary from cache")
+            yield summary
+            return
+        
+        for piece in summary_stream_flight.stream(cache_key, _stream_news_completion, cache_key, system_message,
+                                                  top_items):
+            produced = True
+            yield piece
+        
+    except Exception as e:
+        logger.error(f"Error streaming news summary: {str(e)}")
+        if produced:
+            yield "\n\n(The summary was cut short by an error.)"
+        else:
+            yield "Sorry, I couldn't generate a summary at this time. Please try again later."
+
+def _stream_news_completion(cache_key, system_message, news_items):
+    """Stream the OpenAI completion for a news summary and cache the finished result"""
+    # An earlier stream for the same key may have just filled the cache
+    summary = summary_cache.get(cache_key)
+    if summary is not None:
+        yield summary
+        return
+    
+    user_prompt, max_tokens = _prepare_news_prompt(news_items)
+    
+    started = time.monotonic()
+    stream = client.chat.completions.create(
+        model=NEWS_SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=0.3,
+        max_tokens=max_tokens,
+        stream=True
+    )
+    
+    pieces = []
+    for chunk in stream:
+        piece = chunk.choices[0].delta.content if chunk.choices else None
+        if not piece:
+            continue
+        if not pieces:
+            logger.info(f"First news summary tokens after {time.monotonic() - started:.2f}s")
+        pieces.append(piece)
+        yield piece
+    
+    logger.info(f"Streamed news summary in {time.monotonic() - started:.2f}s")
+    
+    summary = ''.join(pieces)
+    sources = _missing_sources(summary, news_items)
+    if sources:
+        summary += sources
+        yield sources
+    
+    summary_cache.set(cache_key, summary)
+
+def _news_summary_request(user_id, news_items):
+    """Identify the summary a user needs; returns (system message, top items, cache key)"""
     # Get user's customized system message
     system_message = get_user_system_message(user_id, 'news')
     
-    # Prepare news data for the prompt
-    news_data = []
-    for item in news_items[:10]:  # Limit to top 10 items
-        # Get article content
-        content = get_news_content(item['url'])
-        
-        news_data.append({
-            'title': item['title'],
-            'url': item['url'],
-            'source': item['source'],
-            'date': item['date'],
-            'content_preview': content[:3000]  # Limit content size
-        })
+    # Limit to top items
+    top_items = news_items[:NEWS_MAX_ITEMS]
+    
+    # Keyed by the snapshot's items, so a cached summary is found before any extraction or completion
+    cache_key = news_summary_cache_key(system_message, [(item['id'], item.get('content') or '') for item in top_items])
+    return system_message, top_items, cache_key
+
+def _prepare_news_prompt(top_items):
+    """Build the summary prompt for the top items; returns (user prompt, max tokens)"""
+    # Use the snapshot's extracted content when available, extract the rest in parallel
+    missing = [item for item in top_items if 'content' not in item]
+    extracted = dict(zip((id(item) for item in missing), extract_news_contents(missing)))
+    
+    # Prepare news data for the prompt within the token budget
+    articles = []
+    for item in top_items:
+        content = item['content'] if 'content' in item else extracted[id(item)]
+        articles.append(dict(item, content=content or ''))
+    
+    if NEWS_SUMMARY_MODE == 'map_reduce':
+        return _reduce_news_prompt(articles)
+    return _single_news_prompt(articles)
+
+def _single_news_prompt(articles):
+    """One completion over the full article text; returns (prompt, max tokens)"""
+    news_data, prompt_tokens = build_news_prompt(articles, NEWS_PROMPT_TOKEN_BUDGET, model=NEWS_SUMMARY_MODEL)
+    logger.info(f"News prompt for {len(articles)} articles is {prompt_tokens} tokens "
+                f"(budget {NEWS_PROMPT_TOKEN_BUDGET})")
     
     # Create prompt for the AI
     user_prompt = f"""
@@ -225,34 +549,166 @@ def generate_news_summary(user_id, news_items):
     - What the company does
     - How they plan to use the funding
     
-    Articles to summarize:
-    {news_data}
+    Articles to summarize (number, title, source, date and URL, then article text):
+    
+{news_data}
     
     Format your response as a concise news briefing with clear sections for each major funding event.
     At the end, include a list of links to the original articles.
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.3,
-            max_tokens=1500
-        )
-        
-        summary = response.choices[0].message.content
-        
-        # Add source links if not included by the AI
-        if not any(item['url'] for item in news_items if item['url'] in summary):
-            summary += "\n\nSources:\n"
-            for item in news_items[:10]:
-                summary += f"- {item['title']}: {item['url']}\n"
-        
+    return user_prompt, 1500
+
+def _reduce_news_prompt(articles):
+    """
+    Map-reduce: summarize articles one by one, then prompt over the short summaries
+    
+    Per-article summaries don't depend on the user, so they are cached by
+    content and shared by everyone; only the reduce step is personalized.
+    """
+    article_summaries = summarize_articles(articles)
+    news_data, prompt_tokens = build_news_prompt(
+        [dict(article, content=article_summary) for article, article_summary in zip(articles, article_summaries)],
+        NEWS_PROMPT_TOKEN_BUDGET,
+        model=NEWS_SUMMARY_MODEL,
+        # Summaries have no boilerplate; a shared sentence ("Investors were not disclosed.") is real content
+        drop_boilerplate=False
+    )
+    logger.info(f"News reduce prompt for {len(articles)} articles is {prompt_tokens} tokens")
+    
+    user_prompt = f"""
+    Combine these summaries of AI funding news articles into one news briefing.
+    Give each major funding event a clear section with the company, amount and round,
+    investors, what the company does and how it plans to use the funding.
+    
+    Article summaries (number, title, source, date and URL, then summary):
+    
+{news_data}
+    
+    At the end, include a list of links to the original articles.
+    """
+    
+    # The briefing grows with the number of events it covers
+    max_tokens = NEWS_REDUCE_BASE_TOKENS + NEWS_REDUCE_TOKENS_PER_ARTICLE * len(articles)
+    
+    return user_prompt, max_tokens
+
+def article_summary_cache_key(article):
+    """Articles with the same title and text share one summary, whoever asks"""
+    digest = hashlib.sha256(f"{NEWS_SUMMARY_MODEL}\n{article['title']}\n{article['content']}".encode())
+    return digest.hexdigest()
+
+def summarize_article(article):
+    """Summarize one article in a few sentences, from the shared cache when possible"""
+    if not article['content']:
+        return ""
+    
+    key = article_summary_cache_key(article)
+    article_summary = article_summary_cache.get(key)
+    if article_summary is not None:
+        return article_summary
+    
+    return article_summary_flight.do(key, _complete_article_summary, key, article)
+
+def _complete_article_summary(key, article):
+    """Run the small per-article completion and cache the result"""
+    article_summary = article_summary_cache.get(key)
+    if article_summary is not None:
+        return article_summary
+    
+    article_text, _ = build_news_prompt([article], ARTICLE_PROMPT_TOKEN_BUDGET, model=NEWS_SUMMARY_MODEL)
+    response = client.chat.completions.create(
+        model=NEWS_SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": "You summarize startup funding news accurately and briefly."},
+            {"role": "user", "content": "In 2-3 sentences, state the company, funding amount and round, investors, "
+                                        f"what the company does and how it will use the money.\n\n{article_text}"}
+        ],
+        temperature=0.2,
+        max_tokens=ARTICLE_SUMMARY_MAX_TOKENS
+    )
+    
+    article_summary = response.choices[0].message.content.strip()
+    article_summary_cache.set(key, article_summary)
+    return article_summary
+
+def summarize_articles(articles, max_workers=ARTICLE_SUMMARY_WORKERS):
+    """
+    Summarize several articles concurrently, keeping their order
+    
+    An article whose summary fails comes back as an empty string, so the
+    reduce step still covers it by its title.
+    """
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(summarize_article, article) for article in articles]
+    
+    article_summaries = []
+    for article, future in zip(articles, futures):
+        try:
+            article_summaries.append(future.result())
+        except Exception as e:
+            logger.error(f"Error summarizing article {article['url']}: {str(e)}")
+            article_summaries.append("")
+    
+    logger.info(f"Summarized {len(articles)} articles in {time.monotonic() - started:.2f}s")
+    return article_summaries
+
+def _complete_news_summary(cache_key, system_message, news_items):
+    """Build the prompt, run the OpenAI completion for a news summary and cache the result"""
+    # An earlier flight for the same key may have just filled the cache
+    summary = summary_cache.get(cache_key)
+    if summary is not None:
         return summary
-        
-    except Exception as e:
-        logger.error(f"Error generating news summary: {str(e)}")
-        return "Sorry, I couldn't generate a summary at this time. Please try again later."
\ No newline at end of file
+    
+    user_prompt, max_tokens = _prepare_news_prompt(news_items)
+    
+    started = time.monotonic()
+    response = client.chat.completions.create(
+        model=NEWS_SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=0.3,
+        max_tokens=max_tokens
+    )
+    
+    # Per-digest cost and latency
+    usage = response.usage
+    if usage:
+        logger.info(f"News summary completion took {time.monotonic() - started:.2f}s: "
+                    f"{usage.prompt_tokens} prompt + {usage.completion_tokens} completion tokens")
+    
+    summary = response.choices[0].message.content
+    
+    # Add source links if not included by the AI
+    summary += _missing_sources(summary, news_items)
+    
+    summary_cache.set(cache_key, summary)
+    return summary
+
+def _missing_sources(summary, news_items):
+    """Source links to append when the AI left them out of the summary"""
+    if any(item['url'] in summary for item in news_items):
+        return ""
+    
+    sources = "\n\nSources:\n"
+    for item in news_items:
+        sources += f"- {item['title']}: {item['url']}\n"
+    return sources
+
+def news_summary_cache_key(system_message, articles):
+    """Build the summary cache key from the system message and ordered (article ID, content) pairs"""
+    key = hashlib.sha256(system_message.encode()).hexdigest()
+    
+    article_set = hashlib.sha256()
+    for article_id, content in articles:
+        content_digest = hashlib.sha256(content.encode()).hexdigest()
+        article_set.update(f"{article_id}:{content_digest}\n".encode())
+    
+    return f"{key}:{article_set.hexdigest()}"
+
+def get_summary_cache_stats():
+    """Get hit/miss/eviction counters for the news and per-article summary caches"""
+    return dict(summary_cache.get_stats(), articles=article_summary_cache.get_stats())
\ No newline at end of file
@@ -0,0 +1,118 @@
+# prompt_builder.py - Token-budgeted prompt assembly for news summaries
+
+import functools
+import re
+
+# tiktoken is optional; without it token counts are estimated from length
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(\[])')
+NORMALIZE_PATTERN = re.compile(r'\W+')
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model):
+    """tiktoken encoding for a model, or None when tiktoken isn't installed"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+def count_tokens(text, model='gpt-4o-mini'):
+    """Count the tokens of text for a model (about 4 characters per token without tiktoken)"""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+def split_sentences(text):
+    """Split article text into sentences"""
+    return [sentence.strip() for sentence in SENTENCE_PATTERN.split(text or '') if sentence.strip()]
+
+def _sentence_key(sentence):
+    return NORMALIZE_PATTERN.sub(' ', sentence.lower()).strip()
+
+def _format_header(index, article):
+    """One compact header line per article: number, title, source, date and URL"""
+    return f"[{index}] {article['title']} | {article['source']} | {article['date']} | {article['url']}"
+
+def _allocate(needs, weights, budget):
+    """
+    Split a token budget across articles in proportion to their weights
+
+    Articles that need less than their share get exactly what they need,
+    and the leftover is shared again among the rest.
+    """
+    allocation = [0] * len(needs)
+    pending = [index for index, need in enumerate(needs) if need > 0]
+
+    while pending and budget > 0:
+        total_weight = sum(weights[index] for index in pending)
+        satisfied = [index for index in pending if needs[index] <= budget * weights[index] / total_weight]
+
+        if not satisfied:
+            for index in pending:
+                allocation[index] = int(budget * weights[index] / total_weight)
+            break
+
+        for index in satisfied:
+            allocation[index] = needs[index]
+            budget -= needs[index]
+            pending.remove(index)
+
+    return allocation
+
+def build_news_prompt(articles, token_budget, model='gpt-4o-mini', drop_boilerplate=True):
+    """
+    Render articles as compact text that fits in token_budget
+
+    Each article is a dict with title, url, source, date, content and
+    optionally matched_terms. Sentences repeated across articles (cookie
+    banners, newsletter pitches, bylines) are dropped unless
+    drop_boilerplate is False, then the budget left after the headers is
+    shared by relevance: articles matching more AI and funding terms get
+    more of their text in. Returns (text, token count).
+    """
+    sentences = [split_sentences(article.get('content')) for article in articles]
+
+    # Sentences that appear in more than one article are boilerplate
+    seen_in = {}
+    if drop_boilerplate:
+        for index, article_sentences in enumerate(sentences):
+            for sentence in article_sentences:
+                seen_in.setdefault(_sentence_key(sentence), set()).add(index)
+
+    bodies = []
+    for article_sentences in sentences:
+        kept, keys = [], set()
+        for sentence in article_sentences:
+            key = _sentence_key(sentence)
+            if len(seen_in.get(key, ())) > 1 or key in keys:
+                continue
+            keys.add(key)
+            kept.append((sentence, count_tokens(sentence, model) + 1))
+        bodies.append(kept)
+
+    headers = [_format_header(index, article) for index, article in enumerate(articles, 1)]
+    remaining = token_budget - sum(count_tokens(header, model) + 1 for header in headers)
+
+    weights = [1 + len(article.get('matched_terms') or []) for article in articles]
+    needs = [sum(tokens for _, tokens in body) for body in bodies]
+    allocation = _allocate(needs, weights, max(remaining, 0))
+
+    blocks = []
+    for header, body, allowed in zip(headers, bodies, allocation):
+        used, text = 0, []
+        for sentence, tokens in body:
+            if used + tokens > allowed:
+                break
+            text.append(sentence)
+            used += tokens
+        blocks.append(f"{header}\n{' '.join(text)}" if text else header)
+
+    prompt = '\n\n'.join(blocks)
+    return prompt, count_tokens(prompt, model)
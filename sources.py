@@ -0,0 +1,191 @@
+# sources.py - News source registry and concurrent fetch scheduler
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from config import SOURCE_TIMEOUT, SOURCE_MAX_WORKERS, SOURCE_FAILURE_THRESHOLD, SOURCE_RESET_TIMEOUT
+
+# Set up logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class SourcesUnavailable(Exception):
+    """Every registered source failed, timed out or was skipped"""
+
+class PartialFetch(Exception):
+    """A source got only part of its items; they are used, but the fetch counts as failed"""
+
+    def __init__(self, items, reason):
+        super().__init__(reason)
+        self.items = items
+
+class CircuitBreaker:
+    """
+    Stop calling a source after repeated failures
+
+    After failure_threshold consecutive failures the breaker opens and the
+    source is skipped. Once reset_timeout has passed one trial call is let
+    through and other callers are still refused until it reports back;
+    success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=SOURCE_FAILURE_THRESHOLD, reset_timeout=SOURCE_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Check if a call may go through; in half-open state only the first caller gets the trial"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'open' or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._probing = False
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class NewsSource:
+    """
+    A registered news source
+
+    fetch() takes no arguments and returns normalized news items (dicts with
+    id, title, url, source and date). It should raise on failure so the
+    circuit breaker can see it, or raise PartialFetch with the items it
+    did get.
+    """
+
+    def __init__(self, name, fetch, timeout=SOURCE_TIMEOUT):
+        self.name = name
+        self.fetch = fetch
+        self.timeout = timeout
+        self.breaker = CircuitBreaker()
+        self.metrics = {
+            'calls': 0,
+            'failures': 0,
+            'timeouts': 0,
+            'skipped': 0,
+            'last_latency': None,
+            'avg_latency': None,
+            'last_items': 0
+        }
+
+    def record_latency(self, latency):
+        """Track the last and smoothed fetch latency"""
+        self.metrics['last_latency'] = round(latency, 3)
+        average = self.metrics['avg_latency']
+        self.metrics['avg_latency'] = round(latency if average is None else 0.8 * average + 0.2 * latency, 3)
+
+# Registered sources, in registration order
+_sources = {}
+
+# Shared pool so a hung source never holds up the caller beyond its timeout
+_executor = ThreadPoolExecutor(max_workers=SOURCE_MAX_WORKERS, thread_name_prefix='source')
+
+def register_source(name, fetch, timeout=SOURCE_TIMEOUT):
+    """Register (or replace) a news source"""
+    _sources[name] = NewsSource(name, fetch, timeout)
+    return _sources[name]
+
+def get_sources():
+    """Get the registered sources in registration order"""
+    return list(_sources.values())
+
+def _run_source(source):
+    """Fetch one source, timing the call"""
+    started = time.monotonic()
+    try:
+        return source.fetch()
+    finally:
+        source.record_latency(time.monotonic() - started)
+
+def fetch_all_sources():
+    """
+    Fetch every registered source concurrently
+
+    Each source gets its own timeout and circuit breaker, so total latency
+    is that of the slowest healthy source and one dead feed can't stall the
+    rest. Items are returned grouped in source registration order. Raises
+    SourcesUnavailable when no source answered, so an outage isn't mistaken
+    for a day without news.
+    """
+    started = time.monotonic()
+    futures = []
+
+    for source in get_sources():
+        if not source.breaker.allow():
+            source.metrics['skipped'] += 1
+            logger.warning(f"Skipping source {source.name}: circuit open after {source.breaker.failures} failures")
+            continue
+
+        source.metrics['calls'] += 1
+        futures.append((source, _executor.submit(_run_source, source)))
+
+    news_items = []
+    succeeded = 0
+    for source, future in futures:
+        remaining = max(0, started + source.timeout - time.monotonic())
+        try:
+            items = future.result(timeout=remaining) or []
+            source.breaker.record_success()
+            source.metrics['last_items'] = len(items)
+            news_items.extend(items)
+            succeeded += 1
+
+        except PartialFetch as e:
+            source.metrics['failures'] += 1
+            source.breaker.record_failure()
+            source.metrics['last_items'] = len(e.items)
+            news_items.extend(e.items)
+            if e.items:
+                succeeded += 1
+            logger.error(f"Source {source.name} returned {len(e.items)} items before failing: {str(e)}")
+
+        except TimeoutError:
+            source.metrics['timeouts'] += 1
+            source.breaker.record_failure()
+            logger.error(f"Source {source.name} timed out after {source.timeout}s")
+
+        except Exception as e:
+            source.metrics['failures'] += 1
+            source.breaker.record_failure()
+            logger.error(f"Source {source.name} failed: {str(e)}")
+
+    if _sources and not succeeded:
+        raise SourcesUnavailable(f"none of {len(_sources)} news sources answered")
+
+    logger.info(f"Fetched {len(news_items)} items from {succeeded}/{len(futures)} sources in {time.monotonic() - started:.2f}s")
+    return news_items
+
+def get_source_metrics():
+    """Get per-source call counts, latencies and circuit breaker state"""
+    return {
+        source.name: dict(source.metrics, breaker=source.breaker.state, timeout=source.timeout)
+        for source in get_sources()
+    }
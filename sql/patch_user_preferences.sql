@@ -0,0 +1,56 @@
+-- patch_user_preferences - Atomic, single round-trip update of users.preferences
+--
+-- p_set     object merged into preferences (keys overwrite)
+-- p_append  {key: [items]} appended to array keys, skipping items already present
+-- p_remove  {key: [items]} removed from array keys
+--
+-- The row is locked for the duration of the patch, so concurrent patches to
+-- the same user apply one after another instead of overwriting each other.
+
+create or replace function patch_user_preferences(
+    p_user_id text,
+    p_set jsonb default '{}'::jsonb,
+    p_append jsonb default '{}'::jsonb,
+    p_remove jsonb default '{}'::jsonb
+) returns setof users
+language plpgsql
+as $$
+declare
+    prefs jsonb;
+    pref_key text;
+    pref_items jsonb;
+begin
+    select coalesce(preferences, '{}'::jsonb) into prefs
+    from users
+    where id = p_user_id
+    for update;
+
+    if not found then
+        return;
+    end if;
+
+    prefs := prefs || coalesce(p_set, '{}'::jsonb);
+
+    for pref_key, pref_items in select * from jsonb_each(coalesce(p_append, '{}'::jsonb)) loop
+        prefs := jsonb_set(prefs, array[pref_key], coalesce(prefs -> pref_key, '[]'::jsonb) || (
+            select coalesce(jsonb_agg(item), '[]'::jsonb)
+            from jsonb_array_elements(pref_items) as item
+            where not coalesce(prefs -> pref_key, '[]'::jsonb) @> jsonb_build_array(item)
+        ));
+    end loop;
+
+    for pref_key, pref_items in select * from jsonb_each(coalesce(p_remove, '{}'::jsonb)) loop
+        prefs := jsonb_set(prefs, array[pref_key], (
+            select coalesce(jsonb_agg(item), '[]'::jsonb)
+            from jsonb_array_elements(coalesce(prefs -> pref_key, '[]'::jsonb)) as item
+            where not pref_items @> jsonb_build_array(item)
+        ));
+    end loop;
+
+    return query
+        update users
+        set preferences = prefs
+        where id = p_user_id
+        returning *;
+end;
+$$;
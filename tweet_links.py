@@ -0,0 +1,106 @@
+# tweet_links.py - Single-pass tweet link extraction from search result pages
+
+import html
+import re
+from url_utils import unwrap_redirect_url
+
+# Every href in the page, quoted either way
+HREF_PATTERN = re.compile(r'''href\s*=\s*(?:"([^"]*)"|'([^']*)')''', re.IGNORECASE)
+
+# Status links on twitter.com or x.com (and their www./mobile. hosts)
+TWEET_URL_PATTERN = re.compile(
+    r'^https?://(?:www\.|mobile\.)?(?:twitter|x)\.com/([A-Za-z0-9_]{1,15})/status(?:es)?/(\d+)',
+    re.IGNORECASE
+)
+
+# Path segments that look like a username but aren't one (x.com/i/web/status/...)
+RESERVED_NAMES = {'i', 'intent', 'search', 'home', 'share', 'hashtag'}
+
+def parse_tweet_url(url):
+    """Return (username, status_id) for a tweet link, unwrapping redirect wrappers, or None"""
+    match = TWEET_URL_PATTERN.match(unwrap_redirect_url(html.unescape(url)))
+    if not match or match.group(1).lower() in RESERVED_NAMES:
+        return None
+    return match.group(1), match.group(2)
+
+def canonical_tweet_url(username, status_id):
+    """One URL per tweet, whatever host or query string it was found with"""
+    return f"https://x.com/{username}/status/{status_id}"
+
+def extract_tweet_links(html_content):
+    """
+    Find the tweets linked from a page, in page order and without duplicates
+
+    A regex scan over the raw HTML; no DOM is built. Google's /url?q=
+    wrappers are unwrapped, and twitter.com and x.com links to the same
+    status count once. Returns a list of (username, status_id).
+    """
+    links = []
+    seen = set()
+
+    for match in HREF_PATTERN.finditer(html_content or ''):
+        href = match.group(1) or match.group(2)
+
+        # Cheap prefilter; 'status' survives percent-encoding in redirect wrappers
+        if not href or 'status' not in href:
+            continue
+
+        tweet = parse_tweet_url(href)
+        if tweet and tweet[1] not in seen:
+            seen.add(tweet[1])
+            links.append(tweet)
+
+    return links
+
+# Benchmark against the previous BeautifulSoup + substring parsing
+if __name__ == "__main__":
+    import glob
+    import os
+    import sys
+    import time
+    from bs4 import BeautifulSoup
+
+    def soup_extract(html_content):
+        links = []
+        for link in BeautifulSoup(html_content, 'html.parser').find_all('a', href=True):
+            url = link['href']
+            if 'x.com' in url and '/status/' in url:
+                try:
+                    links.append((url.split('x.com/')[1].split('/status/')[0], url.split('/status/')[1].split('?')[0]))
+                except IndexError:
+                    pass
+        return links
+
+    paths = []
+    for argument in sys.argv[1:]:
+        paths.extend(glob.glob(os.path.join(argument, '*.htm*')) if os.path.isdir(argument) else [argument])
+
+    if paths:
+        pages = {path: open(path, encoding='utf-8', errors='replace').read() for path in paths}
+    else:
+        # Synthetic results page: plain, redirect-wrapped, twitter.com and duplicate links among noise
+        results = []
+        for i in range(10):
+            results.append(f'<div class="g"><a href="https://x.com/user{i}/status/{1000 + i}?s=20">Tweet</a></div>')
+            results.append(f'<a href="/url?q=https://twitter.com/user{i}/status/{2000 + i}&amp;sa=U&amp;ved=x">Tweet</a>')
+            results.append(f'<a href="https://x.com/user{i}/status/{1000 + i}">Same tweet</a>')
+        noise = '<div><span class="x">Result snippet text</span><a href="/search?q=more">More</a></div>' * 400
+        page = f"<html><head><script>{'var a = 1;' * 2000}</script></head><body>{noise}{''.join(results)}{noise}</body></html>"
+        pages = {'synthetic page': page}
+
+    total_old = total_new = 0
+    for name, page in pages.items():
+        started = time.perf_counter()
+        old_links = soup_extract(page)
+        old_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        new_links = extract_tweet_links(page)
+        new_time = time.perf_counter() - started
+
+        total_old += old_time
+        total_new += new_time
+        print(f"{os.path.basename(name)[:40]:40} soup {old_time * 1000:7.1f}ms ({len(old_links)} links, "
+              f"{len({status for _, status in old_links})} unique)  regex {new_time * 1000:7.1f}ms ({len(new_links)} tweets)")
+
+    print(f"total: soup {total_old:.3f}s, regex {total_new:.3f}s ({total_old / max(total_new, 1e-9):.1f}x)")
@@ -1,11 +1,27 @@
 # twitter_service.py - Twitter Top Voices Summary Service
 
 import logging
+import os
 import time
-import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Dict
 import urllib.parse
+from config import (
+    DATA_DIR, HTTP_TIMEOUT, TWITTER_SNAPSHOT_TTL, TWITTER_SEARCH_MAX_BYTES, TWITTER_SEARCH_URL,
+    TWITTER_SEARCH_RATE, TWITTER_SEARCH_BURST, TWITTER_SEARCH_WORKERS
+)
+import http_client
+from cache import SharedSnapshot
+from exclusions import exclude_tweets
+from tweet_links import extract_tweet_links, canonical_tweet_url
+from utils import TokenBucket
+
+# Browser-like headers for search result pages
+SEARCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9'
+}
 
 # Choose between different web scraping methods
 def choose_scraping_method():
@@ -14,12 +30,10 @@ def choose_scraping_method():
     """
     try:
         import requests
-        from bs4 import BeautifulSoup
         return requests_scraper
     except ImportError:
         try:
             import urllib.request
-            from bs4 import BeautifulSoup
             return urllib_scraper
         except ImportError:
             logging.error("No web scraping libraries available. Please install requests or urllib.")
@@ -33,19 +47,11 @@ def requests_scraper(url: str) -> str:
         url (str): URL to scrape
     
     Returns:
-        str: HTML content of the page
+        str: HTML content of the page (at most TWITTER_SEARCH_MAX_BYTES are read)
     """
-    import requests
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept-Language': 'en-US,en;q=0.9'
-    }
-    
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        return response.text
+        # Pooled keep-alive session with retries and per-host limits
+        return http_client.fetch_text(url, TWITTER_SEARCH_MAX_BYTES, headers=SEARCH_HEADERS)
     except Exception as e:
         logging.error(f"Error fetching {url}: {e}")
         return ""
@@ -63,32 +69,121 @@ def urllib_scraper(url: str) -> str:
     import urllib.request
     import ssl
 
-    # Create a custom context to bypass SSL verification (use cautiously)
-    context = ssl._create_unverified_context()
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept-Language': 'en-US,en;q=0.9'
-    }
+    # Verify certificates like any other client
+    context = ssl.create_default_context()
 
     try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, context=context, timeout=10) as response:
-            return response.read().decode('utf-8')
+        req = urllib.request.Request(url, headers=SEARCH_HEADERS)
+        with urllib.request.urlopen(req, context=context, timeout=HTTP_TIMEOUT) as response:
+            charset = response.headers.get_content_charset() or 'utf-8'
+            return response.read(TWITTER_SEARCH_MAX_BYTES).decode(charset, errors='replace')
     except Exception as e:
         logging.error(f"Error fetching {url}: {e}")
         return ""
 
-def google_search_tweets(experts: List[str], num_results: int = 3) -> List[Dict[str, str]]:
+# Alternative search queries, tried in order until an expert has enough results
+SEARCH_QUERIES = [
+    'site:x.com "{}" AI latest tweet',
+    '"{}" x.com tweet AI',
+    'from:{} AI tweet'
+]
+
+# One rate limit for every search request, whichever worker makes it
+search_rate_limiter = TokenBucket(TWITTER_SEARCH_RATE, TWITTER_SEARCH_BURST)
+
+def parse_search_results(html_content: str, expert: str, limit: int, seen=None) -> List[Dict[str, str]]:
+    """
+    Extract up to limit tweet links from a search results page
+    
+    Args:
+        html_content (str): HTML of the results page
+        expert (str): Expert the search was for
+        limit (int): Maximum number of tweets to return
+        seen (set, optional): Status IDs already found; skipped here and updated
+    
+    Returns:
+        List[Dict[str, str]]: Extracted tweet information
+    """
+    tweets_data = []
+    seen = set() if seen is None else seen
+    
+    # Redirect-unwrapped, canonical (username, status ID) pairs from a regex scan of the raw HTML
+    for username, tweet_id in extract_tweet_links(html_content):
+        if len(tweets_data) >= limit:
+            break
+        if tweet_id in seen:
+            continue
+        seen.add(tweet_id)
+        
+        url = canonical_tweet_url(username, tweet_id)
+        tweets_data.append({
+            'id': tweet_id,
+            'username': username,
+            'name': expert,
+            'content': "[View original tweet]",
+            'timestamp': datetime.now().isoformat(),
+            'url': url
+        })
+        
+        logging.info(f"Found tweet URL for {expert}: {url}")
+    
+    return tweets_data
+
+def search_expert_tweets(scraper, expert: str, num_results: int,
+                         search_url: str = TWITTER_SEARCH_URL) -> List[Dict[str, str]]:
+    """
+    Run the search queries for one expert in order, stopping once num_results are found
+    
+    Args:
+        scraper (callable): Function returning the HTML of a URL
+        expert (str): Expert to search for
+        num_results (int): Number of results to retrieve
+        search_url (str): Search URL template with a {query} placeholder
+    
+    Returns:
+        List[Dict[str, str]]: Extracted tweet information
+    """
+    tweets_data = []
+    seen = set()
+    
+    for query_template in SEARCH_QUERIES:
+        # Later templates are never requested once the expert has enough tweets
+        if len(tweets_data) >= num_results:
+            break
+        
+        # Construct search URL
+        query = query_template.format(expert)
+        url = search_url.format(query=urllib.parse.quote(query))
+        
+        try:
+            # Wait for the shared rate limit instead of sleeping after every request
+            search_rate_limiter.acquire()
+            html_content = scraper(url)
+            tweets_data.extend(parse_search_results(html_content, expert, num_results - len(tweets_data), seen))
+        
+        except Exception as e:
+            logging.error(f"Error searching for {expert}: {e}")
+    
+    return tweets_data
+
+def google_search_tweets(experts: List[str], num_results: int = 3, max_workers: int = TWITTER_SEARCH_WORKERS,
+                         search_url: str = TWITTER_SEARCH_URL) -> List[Dict[str, str]]:
     """
     Perform a comprehensive search to find recent tweets from AI experts
     
+    Experts are searched concurrently by a bounded pool of workers. Requests
+    from all workers share one token-bucket rate limit, and each expert's
+    queries run in order so the remaining ones are skipped as soon as that
+    expert has num_results tweets.
+    
     Args:
         experts (List[str]): List of experts to search for
         num_results (int): Number of results to retrieve per expert
+        max_workers (int): Experts searched at the same time
+        search_url (str): Search URL template with a {query} placeholder
     
     Returns:
-        List[Dict[str, str]]: Extracted tweet information
+        List[Dict[str, str]]: Extracted tweet information, grouped by expert in input order
     """
     # Configure logging
     logging.basicConfig(level=logging.INFO, 
@@ -99,85 +194,26 @@ def google_search_tweets(experts: List[str], num_results: int = 3) -> List[Dict[
     if not scraper:
         logging.error("No web scraping method available")
         return []
-
-    tweets_data = []
     
-    # Alternative search queries if one fails
-    search_queries = [
-        'site:x.com "{}" AI latest tweet',
-        '"{}" x.com tweet AI',
-        'from:{} AI tweet'
-    ]
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='expert-search') as executor:
+        results = list(executor.map(lambda expert: search_expert_tweets(scraper, expert, num_results, search_url),
+                                    experts))
     
-    for expert in experts:
-        expert_tweets_found = 0
-        
-        for query_template in search_queries:
-            if expert_tweets_found >= num_results:
-                break
-            
-            # Construct Google search URL
-            query = query_template.format(expert)
-            search_url = f"https://www.google.com/search?q={urllib.parse.quote(query)}"
-            
-            try:
-                # Fetch search results
-                html_content = scraper(search_url)
-                
-                # Parse HTML (use BeautifulSoup if available)
-                try:
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(html_content, 'html.parser')
-                    
-                    # Find links in search results
-                    links = soup.find_all('a', href=True)
-                    
-                    for link in links:
-                        url = link['href']
-                        
-                        # Filter for X.com tweet URLs
-                        if 'x.com' in url and '/status/' in url:
-                            try:
-                                # Extract username and tweet ID
-                                username = url.split('x.com/')[1].split('/status/')[0]
-                                tweet_id = url.split('/status/')[1].split('?')[0]
-                                
-                                # Create tweet data dictionary
-                                tweet_info = {
-                                    'id': tweet_id,
-                                    'username': username,
-                                    'name': expert,
-                                    'content': "[View original tweet]",
-                                    'timestamp': datetime.now().isoformat(),
-                                    'url': url
-                                }
-                                
-                                tweets_data.append(tweet_info)
-                                expert_tweets_found += 1
-                                
-                                logging.info(f"Found tweet URL for {expert}: {url}")
-                                
-                                # Stop if we've found enough tweets
-                                if expert_tweets_found >= num_results:
-                                    break
-                            
-                            except Exception as parse_error:
-                                logging.error(f"Error parsing tweet URL {url}: {parse_error}")
-                    
-                except ImportError:
-                    logging.warning("BeautifulSoup not available. Using basic parsing.")
-                
-                # Random delay to avoid rate limiting
-                time.sleep(random.uniform(1, 3))
-            
-            except Exception as e:
-                logging.error(f"Error searching for {expert}: {e}")
+    # The same tweet can turn up in several experts' results; keep the first
+    tweets_data = []
+    seen = set()
+    for tweet in (tweet for expert_tweets in results for tweet in expert_tweets):
+        if tweet['id'] not in seen:
+            seen.add(tweet['id'])
+            tweets_data.append(tweet)
     
+    logging.info(f"Searched {len(experts)} experts in {time.monotonic() - started:.2f}s")
     return tweets_data
 
-def fetch_top_tweets():
+def search_top_tweets():
     """
-    Fetch tweets from top AI voices using Google search
+    Search for tweets from top AI voices using Google search
     
     Returns:
         list: List of tweet dictionaries
@@ -198,6 +234,23 @@ def fetch_top_tweets():
     logger.info(f"Found {len(tweets)} tweets from top AI voices")
     return tweets
 
+# Raw tweet list shared by every user; searched at most once per window
+tweet_snapshot = SharedSnapshot(
+    'tweets',
+    search_top_tweets,
+    ttl=TWITTER_SNAPSHOT_TTL,
+    path=os.path.join(DATA_DIR, 'tweet_snapshot.json')
+)
+
+def fetch_top_tweets():
+    """
+    Get tweets from top AI voices from the shared snapshot
+    
+    Returns:
+        list: List of tweet dictionaries (filter per user with filter_tweets)
+    """
+    return tweet_snapshot.get() or []
+
 def filter_tweets(tweets, excluded_accounts=None):
     """
     Filter tweets based on user preferences
@@ -209,13 +262,8 @@ def filter_tweets(tweets, excluded_accounts=None):
     Returns:
         list: Filtered list of tweets
     """
-    if not excluded_accounts:
-        excluded_accounts = []
-    
-    filtered_tweets = [
-        tweet for tweet in tweets
-        if tweet['username'].lower() not in [account.lower() for account in excluded_accounts]
-    ]
+    # Handles and display names are compared as one precompiled normalized set
+    filtered_tweets = exclude_tweets(tweets, excluded_accounts)
     
     logging.info(f"Filtered to {len(filtered_tweets)} tweets after applying exclusions")
     return filtered_tweets
@@ -0,0 +1,51 @@
+# url_utils.py - URL normalization helpers (no configuration needed, so any module can import them)
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'guccounter', 'guce_referrer', 'guce_referrer_sig'}
+
+# Redirect wrappers that carry the real destination in a query parameter
+REDIRECT_PARAMS = ('url', 'q', 'u', 'target', 'dest', 'destination', 'redirect', 'redirect_url')
+
+def unwrap_redirect_url(url):
+    """Return the destination of a redirect wrapper link (e.g. google.com/url?q=...), or the URL itself"""
+    try:
+        for _ in range(3):  # Wrappers are occasionally nested
+            parts = urlsplit(url)
+            params = dict(parse_qsl(parts.query))
+            
+            target = next((params[name] for name in REDIRECT_PARAMS
+                           if params.get(name, '').startswith(('http://', 'https://'))), None)
+            if not target:
+                return url
+            url = target
+        return url
+        
+    except Exception:
+        return url
+
+def normalize_url(url):
+    """Normalize a URL so the same article always produces the same key"""
+    try:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').lower()
+        
+        # Keep non-default ports only
+        if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+            host = f"{host}:{parts.port}"
+        
+        # Drop tracking parameters and sort the rest
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                 if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS]
+        query.sort()
+        
+        path = parts.path or '/'
+        if len(path) > 1:
+            path = path.rstrip('/')
+        
+        return urlunsplit((scheme, host, path, urlencode(query), ''))
+        
+    except Exception:
+        return url
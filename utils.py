@@ -1,14 +1,94 @@
 # utils.py - Utility functions
 
+import asyncio
+import functools
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import hashlib
+from config import BLOCKING_MAX_WORKERS
+# URL helpers live in url_utils so config-free modules can use them; re-exported for existing imports
+from url_utils import TRACKING_PARAMS, REDIRECT_PARAMS, unwrap_redirect_url, normalize_url
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Bounded pool for blocking calls (Supabase, scraping, OpenAI) made from async handlers
+blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_MAX_WORKERS, thread_name_prefix='blocking')
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking function on the shared executor without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, functools.partial(func, *args, **kwargs))
+
+async def iterate_blocking(func, *args, **kwargs):
+    """
+    Iterate a blocking generator from async code
+    
+    The generator runs on the shared executor and hands each item to the
+    event loop through a queue, so the caller can act on the first item
+    while the rest are still being produced. Exceptions are re-raised here.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    
+    def produce():
+        try:
+            for item in func(*args, **kwargs):
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+    
+    producer = loop.run_in_executor(blocking_executor, produce)
+    while True:
+        item, error = await queue.get()
+        if item is done:
+            break
+        yield item
+    
+    await producer
+    if error:
+        raise error
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every caller that must respect one rate limit"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self):
+        """Take a token and return how many seconds the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            
+            # Going negative queues the caller behind earlier reservations
+            self._tokens -= 1
+            return 0 if self._tokens >= 0 else -self._tokens / self.rate
+    
+    def acquire(self):
+        """Block until a token is available"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+    
+    async def acquire_async(self):
+        """Wait for a token without blocking the event loop"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
 def generate_content_id(content):
     """Generate a unique ID for content"""
     if isinstance(content, str):
@@ -60,4 +140,4 @@ def split_long_message(message, max_length=4000):
     remaining = message[split_point:]
     
     # Recursively split the remaining message
-    return [first_part] + split_long_message(remaining, max_length)
\ No newline at end of file
+    return [first_part] + split_long_message(remaining, max_length)